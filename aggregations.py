@@ -0,0 +1,456 @@
+"""
+Every number the dashboard shows, computed without Streamlit.
+
+Each aggregate takes a (filtered) AccidentStore and returns a DataFrame; the
+dashboard draws its charts from these, and the command line writes them for
+batch reports:
+
+    python aggregations.py --state Karnataka --severity Fatal --output report.json
+    python aggregations.py --per-state --format parquet --output reports/
+
+Before starting the server, --warm fills the on-disk cache the dashboard
+reads at startup (the indexed store and every unfiltered count):
+
+    python aggregations.py --warm && streamlit run app.py
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import pandas as pd
+
+import ingest
+from bitmap import BitmapIndex
+from cache import AggregateCache
+from cube import CountCube
+from store import AccidentStore, Binned, Mapped
+from tracing import span
+
+# Age ranges with 5-year intervals
+AGE_BINS = list(range(18, 66, 5))
+AGE_LABELS = [f'{i}-{i+4}' for i in range(18, 61, 5)]
+
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Age decades, e.g. 20-29
+AGE_DECADE_BINS = list(range(10, 80, 10))
+AGE_DECADE_LABELS = [f'{i}-{i+9}' for i in range(10, 70, 10)]
+
+QUARTER_LABELS = ['Q1', 'Q2', 'Q3', 'Q4']
+MONTH_QUARTERS = {month: QUARTER_LABELS[i // 3] for i, month in enumerate(MONTH_ORDER)}
+
+# Label order of categorical columns whose natural order is not alphabetical;
+# applied once at load, so every chart and filter lists them this way
+COLUMN_ORDERS = {
+    'DayOfWeek': DAY_ORDER,
+    'Month': MONTH_ORDER,
+}
+
+# Columns computed from others once at load (and for appended rows), in label order
+DERIVED_COLUMNS = {
+    'Age Range': Binned('Age', AGE_BINS, AGE_LABELS),
+    'Age Decade': Binned('Age', AGE_DECADE_BINS, AGE_DECADE_LABELS),
+    'Quarter': Mapped('Month', MONTH_QUARTERS, QUARTER_LABELS),
+}
+
+# Every group-by the dashboard charts; the count cube materializes these
+DASHBOARD_GROUPINGS = [
+    ['Year', 'Month'],
+    ['DayOfWeek', 'Shift'],
+    ['Shift', 'Accident Severity'],
+    ['Hour Type'],
+    ['Local'],
+    ['State', 'Industry Sector'],
+    ['State', 'Accident Type'],
+    ['Industry Sector', 'Accident Type'],
+    ['Industry Sector', 'Critical Risk', 'Safety Gear'],
+    ['Industry Sector', 'Gender'],
+    ['Gender', 'Accident Severity'],
+    ['Age Range', 'Gender'],
+    ['Age Range', 'Accident Type'],
+    ['Employee Type'],
+    ['Critical Risk', 'Accident Type'],
+]
+
+# Bump when build_store changes what a store holds, so older snapshots are rebuilt
+SNAPSHOT_FORMAT = 1
+
+# Where load_store snapshots and saved counts go by default
+CACHE_DIR = 'cache'
+
+# Columns the Overview tab counts, all computed in one pass over the filtered data
+OVERVIEW_COLUMNS = [
+    'Year', 'DayOfWeek', 'Shift', 'State', 'Industry Sector', 'Accident Severity',
+    'Accident Type', 'Gender', 'Age Range', 'Employee Type', 'Safety Gear'
+]
+
+
+def build_store(df):
+    """Encode a DataFrame of accidents into an indexed store with the dashboard's count cube"""
+    # Hold categorical columns as integer codes plus a shared dictionary
+    with span('encode', 'load'):
+        store = AccidentStore.from_frame(df)
+    with span('derived columns', 'load'):
+        for column, order in COLUMN_ORDERS.items():
+            store = store.with_order(column, order)
+        for column, spec in DERIVED_COLUMNS.items():
+            store = store.with_derived(column, spec)
+    # Per-value bitmaps so sidebar filters are set operations instead of column scans
+    with span('bitmap index', 'load'):
+        store = store.with_index(BitmapIndex.build(store.codes))
+    # Materialize the dashboard's counts once so filtered charts slice instead of scan
+    with span('count cube', 'load'):
+        return store.with_cube(CountCube.build(store, DASHBOARD_GROUPINGS))
+
+
+def dataset_key(dataset_path=ingest.DATASET_PATH):
+    """
+    Name of the dataset's contents: the hash of the CSV bytes recorded when it
+    was converted (see ingest.ensure_dataset), with the snapshot format
+    """
+    content_hash = ingest.dataset_content_hash(dataset_path)
+    return hashlib.sha1(f'{SNAPSHOT_FORMAT}:{content_hash}'.encode()).hexdigest()[:16]
+
+
+def source_name(dataset_path=ingest.DATASET_PATH):
+    """
+    Folder name for one dataset's entries in a cache shared by several: the
+    dataset's file name and a hash of its full path
+    """
+    name = os.path.splitext(os.path.basename(dataset_path))[0]
+    return f"{name}-{hashlib.sha1(os.path.abspath(dataset_path).encode()).hexdigest()[:8]}"
+
+
+def load_store(csv_path=ingest.CSV_PATH, dataset_path=ingest.DATASET_PATH, cache_dir=None):
+    """
+    Store of the dataset, converting the CSV (or the CSV files matching a glob
+    pattern, see ingest.convert_csv_files) on first use. With `cache_dir`, the
+    built store (codes, index and count cube) is kept there as a snapshot named
+    by dataset_key, in a folder per dataset (see source_name): a restarted
+    process loads it instead of reading and indexing the data, and a changed
+    CSV gets a new one. The store's version is '<source name>/<dataset_key>'.
+    """
+    # Convert the CSV to the typed columnar file on first use, then memory-map it
+    dataset_path = ingest.ensure_dataset(csv_path, dataset_path)
+    if cache_dir is not None:
+        key = dataset_key(dataset_path)
+        source_dir = os.path.join(cache_dir, source_name(dataset_path))
+        snapshot_path = os.path.join(source_dir, f'store-{key}.pkl')
+        if os.path.exists(snapshot_path):
+            with span('read snapshot', 'load'), open(snapshot_path, 'rb') as f:
+                return pickle.load(f)
+    with span('read dataset', 'load'):
+        df = ingest.read_dataset(dataset_path, columns=ingest.DASHBOARD_COLUMNS)
+    store = build_store(df)
+    if cache_dir is None:
+        return store
+    store = store.with_version(f'{source_name(dataset_path)}/{key}')
+    with span('write snapshot', 'load'):
+        os.makedirs(source_dir, exist_ok=True)
+        temporary = f'{snapshot_path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            pickle.dump(store, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, snapshot_path)
+        # Snapshots of this dataset's earlier contents are never read again
+        for stale in glob.glob(os.path.join(source_dir, 'store-*.pkl')):
+            if stale != snapshot_path:
+                os.remove(stale)
+    return store
+
+
+def apply_filters(store, selections):
+    """Restrict the store to the selections (column -> values); values within a
+    column are OR-ed, columns are AND-ed, and empty selections mean all"""
+    for column, values in selections.items():
+        if values:
+            store = store.isin(column, values)
+    return store
+
+
+def _with_share(counts, group=None, decimals=None):
+    # Percentage of each count within its group (or of the total)
+    if group is None:
+        share = counts['Count'] / counts['Count'].sum() * 100
+    else:
+        share = counts['Count'] / counts.groupby(group, observed=True)['Count'].transform('sum') * 100
+    counts['Percentage'] = share if decimals is None else share.round(decimals)
+    return counts
+
+
+# Overview
+
+def overview_counts(store):
+    """value_counts of every Overview column, from one pass over the data"""
+    return store.value_counts_many(OVERVIEW_COLUMNS)
+
+
+def age_counts(store, counts=None):
+    """Accidents per age range, every range listed in age order"""
+    counts = store.value_counts('Age Range') if counts is None else counts
+    return counts.reindex(pd.Index(store.labels('Age Range'), name='Age Range'), fill_value=0)
+
+
+# Temporal
+
+def year_month(store):
+    """Year x Month count matrix, every month in calendar order"""
+    return store.crosstab('Year', 'Month').reindex(columns=store.labels('Month'), fill_value=0)
+
+
+def day_shift(store):
+    """Day of week x Shift count matrix, every day in week order"""
+    return store.crosstab('DayOfWeek', 'Shift').reindex(store.labels('DayOfWeek'), fill_value=0)
+
+
+def hour_type_share(store):
+    """Accidents per hour type with their percentage of the total"""
+    counts = store.value_counts('Hour Type')
+    return _with_share(pd.DataFrame({'Hour Type': counts.index, 'Count': counts.values}))
+
+
+def shift_severity(store):
+    return store.counts(['Shift', 'Accident Severity'])
+
+
+# Geographic
+
+def state_counts(store):
+    """Accidents per state, as joined onto the choropleth's boundaries"""
+    return store.counts(['State'], name='Accident_Count')
+
+
+def state_sector(store):
+    return store.counts(['State', 'Industry Sector'])
+
+
+def severity_by_state(store):
+    """Severity counts per state with each severity's percentage of the state's accidents"""
+    return _with_share(store.counts(['State', 'Accident Severity']), group='State', decimals=1)
+
+
+def top_locals(store, n=10):
+    return store.value_counts('Local').head(n)
+
+
+def state_type(store):
+    return store.counts(['State', 'Accident Type'])
+
+
+# Industry
+
+def sector_type(store):
+    return store.counts(['Industry Sector', 'Accident Type'])
+
+
+def sector_severity(store):
+    return store.counts(['Industry Sector', 'Accident Severity'])
+
+
+def sector_gear(store):
+    return store.counts(['Industry Sector', 'Safety Gear'])
+
+
+# Demographic
+
+def gender_share(store):
+    """Accidents per gender with their percentage of the total"""
+    counts = store.value_counts('Gender')
+    return _with_share(pd.DataFrame({'Gender': counts.index, 'Count': counts.values}), decimals=1)
+
+
+def severity_by_gender(store):
+    """Severity counts per gender with each severity's percentage of the gender's accidents"""
+    return _with_share(store.counts(['Gender', 'Accident Severity']), group='Gender', decimals=1)
+
+
+def gender_by_industry(store):
+    """Gender counts per sector with each gender's percentage of the sector's accidents"""
+    return _with_share(store.counts(['Industry Sector', 'Gender']), group='Industry Sector', decimals=1)
+
+
+def age_gender(store):
+    return store.counts(['Age Range', 'Gender'], observed=False)
+
+
+def employee_counts(store):
+    return store.value_counts('Employee Type')
+
+
+def age_type(store):
+    return store.counts(['Age Range', 'Accident Type'], observed=False)
+
+
+# Risk
+
+def severity_type(store):
+    return store.counts(['Accident Severity', 'Accident Type'])
+
+
+def gear_by_severity(store):
+    """Safety gear counts per severity with each one's percentage of the severity's accidents"""
+    return _with_share(store.counts(['Safety Gear', 'Accident Severity']), group='Accident Severity')
+
+
+def risk_type(store):
+    return store.counts(['Critical Risk', 'Accident Type'])
+
+
+def risk_factors(store):
+    return store.counts(['Industry Sector', 'Critical Risk', 'Safety Gear'])
+
+
+# Name -> aggregate, in dashboard tab order
+AGGREGATES = {
+    'temporal/year_month': year_month,
+    'temporal/day_shift': day_shift,
+    'temporal/hour_type': hour_type_share,
+    'temporal/shift_severity': shift_severity,
+    'geographic/state_counts': state_counts,
+    'geographic/state_sector': state_sector,
+    'geographic/severity_by_state': severity_by_state,
+    'geographic/top_locals': top_locals,
+    'geographic/state_type': state_type,
+    'industry/sector_type': sector_type,
+    'industry/sector_severity': sector_severity,
+    'industry/sector_gear': sector_gear,
+    'demographic/gender': gender_share,
+    'demographic/severity_by_gender': severity_by_gender,
+    'demographic/gender_by_industry': gender_by_industry,
+    'demographic/age_gender': age_gender,
+    'demographic/employee_type': employee_counts,
+    'demographic/age_type': age_type,
+    'risk/severity_type': severity_type,
+    'risk/gear_by_severity': gear_by_severity,
+    'risk/risk_type': risk_type,
+    'risk/risk_factors': risk_factors,
+}
+
+
+def _as_frame(result):
+    # Tables keep their row labels as a column so every aggregate is flat
+    if isinstance(result, pd.Series):
+        return result.rename('Count').reset_index()
+    if not isinstance(result.index, pd.RangeIndex):
+        result = result.reset_index()
+        result.columns = [str(column) for column in result.columns]
+    return result
+
+
+def all_aggregates(store):
+    """Name -> flat DataFrame for every aggregate the dashboard shows"""
+    results = {'overview/total': pd.DataFrame({'Accidents': [len(store)]})}
+    counts = overview_counts(store)
+    for column in OVERVIEW_COLUMNS:
+        if column != 'Age Range':
+            results[f'overview/{column}'] = _as_frame(counts[column])
+    results['overview/Age Range'] = _as_frame(age_counts(store, counts['Age Range']))
+    for name, aggregate in AGGREGATES.items():
+        results[name] = _as_frame(aggregate(store))
+    return results
+
+
+def warm(csv_path=ingest.CSV_PATH, dataset_path=ingest.DATASET_PATH, cache_dir=CACHE_DIR):
+    """Save the store snapshot and every unfiltered aggregate's counts in `cache_dir`"""
+    store = load_store(csv_path, dataset_path, cache_dir=cache_dir)
+    # Memory only needs to hold one report; counts worth keeping are saved to disk
+    aggregates = AggregateCache(1 << 30, os.path.join(cache_dir, 'aggregates'))
+    aggregates.prune_disk({store.version})
+    all_aggregates(store.with_aggregate_cache(aggregates))
+    aggregates.flush()
+    return aggregates.stats()
+
+
+def write_report(results, path, output_format, selections):
+    """Write aggregates as one JSON document ("-" for stdout), or as a folder of Parquet files"""
+    if output_format == 'json':
+        document = {
+            'filters': {column: list(values) for column, values in selections.items() if values},
+            'aggregates': {name: json.loads(frame.to_json(orient='records'))
+                           for name, frame in results.items()}
+        }
+        if path == '-':
+            json.dump(document, sys.stdout, indent=2)
+            return
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(document, f, indent=2)
+    else:
+        for name, frame in results.items():
+            file_path = os.path.join(path, name + '.parquet')
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            frame.to_parquet(file_path, index=False)
+
+
+def _parse_filter(text):
+    column, _, value = text.partition('=')
+    if not value:
+        raise argparse.ArgumentTypeError(f"expected COLUMN=VALUE, got {text!r}")
+    return column, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the dashboard's aggregates for a filter set")
+    parser.add_argument('--state', action='append', default=[], help='repeat for several states')
+    parser.add_argument('--severity', action='append', default=[], help='repeat for several severities')
+    parser.add_argument('--filter', action='append', default=[], type=_parse_filter,
+                        metavar='COLUMN=VALUE', help='any other column, e.g. "Industry Sector=Steel"')
+    parser.add_argument('--per-state', action='store_true',
+                        help='write one report per state into the output folder')
+    parser.add_argument('--format', choices=['json', 'parquet'], default='json')
+    parser.add_argument('--output', default='-',
+                        help='JSON file ("-" for stdout) or Parquet folder; with --per-state, a folder (required)')
+    parser.add_argument('--csv', default=ingest.CSV_PATH,
+                        help="report CSV, or a quoted glob pattern of CSV files such as 'drops/**/*.csv'")
+    parser.add_argument('--warm', action='store_true',
+                        help="fill the dashboard's on-disk cache for the CSV and exit")
+    parser.add_argument('--cache-dir', default=os.environ.get('CACHE_DIR', CACHE_DIR),
+                        help='cache folder for --warm (default: $CACHE_DIR or cache)')
+    args = parser.parse_args(argv)
+    if args.per_state and args.output == '-':
+        parser.error('--per-state writes one report per state: give a folder with --output')
+    dataset_path = ingest.dataset_path_for(args.csv)
+
+    if args.warm:
+        stats = warm(args.csv, dataset_path, args.cache_dir)
+        print(f"Cached the store and saved {stats['disk_writes']:,} of {stats['entries']:,} counts "
+              f"in {args.cache_dir}")
+        return
+
+    selections = {'State': args.state, 'Accident Severity': args.severity}
+    for column, value in args.filter:
+        selections.setdefault(column, []).append(value)
+    store = load_store(args.csv, dataset_path)
+    unknown = [column for column in selections if column not in store.dictionaries]
+    if unknown:
+        parser.error(f"unknown filter column {unknown[0]!r}; choose from {', '.join(store.dictionaries)}")
+    # Values arrive as text; match them to the column's labels, e.g. "2020" to the Year 2020
+    for column, values in selections.items():
+        labels = {str(label): label for label in store.labels(column)}
+        missing = [value for value in values if value not in labels]
+        if missing:
+            parser.error(f"no {column} {missing[0]!r} in the data; choose from {', '.join(labels)}")
+        selections[column] = [labels[value] for value in values]
+
+    if not args.per_state:
+        write_report(all_aggregates(apply_filters(store, selections)), args.output, args.format,
+                     selections)
+        return
+
+    # Every state from one load; each filter is answered from the count cube and index
+    for state in store.labels('State'):
+        state_selections = dict(selections, State=[state])
+        results = all_aggregates(apply_filters(store, state_selections))
+        name = state.replace('/', '-')
+        path = os.path.join(args.output, name + ('.json' if args.format == 'json' else ''))
+        write_report(results, path, args.format, state_selections)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,41 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import folium
-from streamlit_folium import folium_static
-import geopandas as gpd
+import importlib
 import json
 import os
 import math
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+import approx
+import ingest
+from cache import AggregateCache, FigureCache, filter_key
+from parallel import ParallelCounter
+from geo import STATE_NAME_INDEX, level_for_zoom, load_simplified
+import aggregations
+from aggregations import build_store
+import tracing
+from tracing import span
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first use"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+# Plotly is imported when the first figure is built, not at startup; pages served
+# from the figure cache never need it
+px = LazyModule('plotly.express')
+go = LazyModule('plotly.graph_objects')
 
 # Set page configuration
 st.set_page_config(
@@ -16,13 +44,370 @@ st.set_page_config(
     layout="wide"
 )
 
+# Categorical columns offered as extra sidebar filters, besides State and Severity
+MORE_FILTER_COLUMNS = [
+    'Industry Sector', 'Accident Type', 'Shift', 'Gender', 'Safety Gear',
+    'Employee Type', 'Critical Risk', 'Hour Type', 'Age Range', 'Age Decade', 'Year',
+    'Quarter', 'Month', 'DayOfWeek', 'Local'
+]
+
+# Memory budget for cached chart figures in MB (override with FIGURE_CACHE_MB)
+FIGURE_CACHE_MB = int(os.environ.get('FIGURE_CACHE_MB', '128'))
+
+# Memory budget for cached group-by counts in MB, shared by all sessions in a
+# server process (override with AGGREGATE_CACHE_MB)
+AGGREGATE_CACHE_MB = int(os.environ.get('AGGREGATE_CACHE_MB', '64'))
+
+# Counts that took at least this many milliseconds to compute are also saved
+# under CACHE_DIR, up to AGGREGATE_DISK_MB (override with AGGREGATE_DISK_MIN_MS
+# and AGGREGATE_DISK_MB)
+AGGREGATE_DISK_MIN_MS = float(os.environ.get('AGGREGATE_DISK_MIN_MS', '10'))
+AGGREGATE_DISK_MB = int(os.environ.get('AGGREGATE_DISK_MB', '256'))
+
+# Figures whose JSON exceeds this many KB get a warning under the chart, since the
+# whole payload goes to the browser (override with FIGURE_PAYLOAD_WARN_KB)
+FIGURE_PAYLOAD_WARN_KB = int(os.environ.get('FIGURE_PAYLOAD_WARN_KB', '1024'))
+
+# Threads that build and serialize a tab's figures concurrently
+# (override with FIGURE_THREADS; 0 or 1 builds each chart where it appears)
+FIGURE_THREADS = int(os.environ.get('FIGURE_THREADS', '4'))
+
+# Report CSV the dashboard is built from, or a glob pattern of CSV files such as
+# 'drops/**/*.csv', parsed in parallel and watched for new files (override with CSV_SOURCE)
+CSV_SOURCE = os.environ.get('CSV_SOURCE', ingest.CSV_PATH)
+DATASET_PATH = ingest.dataset_path_for(CSV_SOURCE)
+
+# Folder watched for new report CSVs (override with INCOMING_DIR)
+INCOMING_DIR = os.environ.get('INCOMING_DIR', ingest.INCOMING_DIR)
+
+# Worker processes for group-bys the count cube does not cover, e.g. under
+# "More filters" (override with AGGREGATION_WORKERS; 0 or 1 scans in-process)
+AGGREGATION_WORKERS = int(os.environ.get('AGGREGATION_WORKERS', '0'))
+
+# Folder that receives a Chrome trace file of every rerun's timing spans
+# (set TRACE_DIR to enable; the sidebar "Show timings" panel works without it)
+TRACE_DIR = os.environ.get('TRACE_DIR')
+
+# Where the indexed dataset and computed counts are kept between runs, named by a
+# hash of the CSV content so a changed file is rebuilt (override with CACHE_DIR)
+CACHE_DIR = os.environ.get('CACHE_DIR', aggregations.CACHE_DIR)
+
+# Where simplified map boundaries are cached between runs (override with GEO_CACHE_DIR)
+GEO_CACHE_DIR = os.environ.get('GEO_CACHE_DIR', os.path.join(CACHE_DIR, 'geo'))
+
+# Approximate counts: datasets of at least APPROXIMATE_MIN_ROWS rows start with the
+# sidebar's "Approximate counts" on, and counts the count cube does not cover are then
+# estimated from a stratified sample of about APPROXIMATE_SAMPLE_ROWS rows (by State)
+APPROXIMATE_MIN_ROWS = int(os.environ.get('APPROXIMATE_MIN_ROWS', '5000000'))
+APPROXIMATE_SAMPLE_ROWS = int(os.environ.get('APPROXIMATE_SAMPLE_ROWS', '1000000'))
+
+# Columns whose chart can select marks to filter every other chart (cross-filtering).
+# Streamlit 1.32 charts do not report clicked marks, so each such chart gets a selector
+# for its marks underneath: State (choropleth) and the Overview's bar and pie charts
+CROSS_FILTER_COLUMNS = ['State', 'Shift', 'Industry Sector', 'Accident Severity',
+                        'Accident Type', 'Gender']
+
+# Initial zoom of the state map, which also picks its boundary detail level
+MAP_ZOOM = 3.8
+
+# Partitioned copy of the data for archives larger than RAM (override with
+# PARTITIONED_PATH); when the folder exists, only the partitions matching the
+# State, Severity and year filters are read
+PARTITIONED_PATH = os.environ.get('PARTITIONED_PATH', ingest.PARTITIONED_PATH)
+
+# Most rows of a partitioned archive loaded at once; wider selections ask for
+# narrower filters instead of being read into memory (override with PARTITION_MAX_ROWS)
+PARTITION_MAX_ROWS = int(os.environ.get('PARTITION_MAX_ROWS', '20000000'))
+
 # Load data
 
 
-@st.cache_data
+# Held once per process and shared by every session: the store is read-only and
+# filtering makes views, where st.cache_data would hand each caller its own copy
+@st.cache_resource
 def load_data():
-    df = pd.read_csv('Indian_Industrial_Accidents.csv')
-    return df
+    return aggregations.load_store(CSV_SOURCE, DATASET_PATH, cache_dir=CACHE_DIR)
+
+@st.cache_data
+def load_catalog():
+    return ingest.read_catalog(PARTITIONED_PATH)
+
+@st.cache_data(max_entries=64)
+def count_partitions(states, severities, years):
+    return ingest.count_partition_rows(PARTITIONED_PATH, states=states, years=years, severities=severities)
+
+# Stores are read-only, so the few most recent partition selections are kept as shared objects
+@st.cache_resource(max_entries=8)
+def load_partitions(states, severities, years):
+    """Store of only the rows in the selected partitions"""
+    df = ingest.read_partitions(PARTITIONED_PATH, ingest.DASHBOARD_COLUMNS,
+                                states=states, years=years, severities=severities)
+    # The version tells the figure and aggregate caches which partitions the store holds
+    store = build_store(df).with_version((states, severities, years))
+    return store.with_aggregate_cache(get_aggregate_cache())
+
+# The live store and the watcher that feeds it new reports, shared by every session
+def attach_counter(store):
+    """Give the store a process pool over its codes when parallel aggregation is enabled"""
+    if AGGREGATION_WORKERS > 1:
+        return store.with_counter(ParallelCounter(store.codes, AGGREGATION_WORKERS))
+    return store
+
+@st.cache_resource
+def get_live_data():
+    # Appended stores keep the cache; their new version keeps earlier counts from being reused
+    store = attach_counter(load_data()).with_aggregate_cache(get_aggregate_cache())
+    # Counts saved for earlier contents of the CSV are never read again
+    get_aggregate_cache().prune_disk({store.version})
+    watcher = ingest.AppendWatcher(CSV_SOURCE, ingest.dataset_csv_offset(DATASET_PATH), INCOMING_DIR,
+                                   files=ingest.dataset_source_files(DATASET_PATH))
+    return {'store': store, 'watcher': watcher, 'lock': threading.Lock()}
+
+def refresh_data():
+    """The live store, with any reports that arrived since the last rerun folded in"""
+    live = get_live_data()
+    with live['lock']:
+        new_rows = live['watcher'].poll()
+        # Sources that failed to parse are left out until they are fixed; the rest still load
+        for error in live['watcher'].errors.values():
+            st.warning(f"New reports were not loaded: {error}")
+        if new_rows is not None:
+            # The counter is extended by the append; views of the previous store,
+            # still used by other sessions, keep counting with it
+            live['store'] = live['store'].append(new_rows)
+        return live['store']
+
+def sample_live_data():
+    """The live store with a sample attached, drawn once: appends then extend it from the new rows"""
+    live = get_live_data()
+    with live['lock']:
+        if live['store'].sample is None:
+            with span('draw sample', 'load'):
+                sample = live['store'].stratified_sample(APPROXIMATE_SAMPLE_ROWS)
+            live['store'] = live['store'].with_sample(sample)
+        return live['store']
+
+# One sample per partition selection, shared by every session; the store argument is not hashed
+@st.cache_resource(max_entries=4)
+def load_sample(_store, version):
+    with span('draw sample', 'load'):
+        return _store.stratified_sample(APPROXIMATE_SAMPLE_ROWS)
+
+@st.cache_resource
+def start_prewarm():
+    """Once per process: compute every tab's unfiltered counts on a background thread,
+    so opening another tab with the default filters hits the aggregate cache"""
+    thread = threading.Thread(target=aggregations.all_aggregates, args=(get_live_data()['store'],),
+                              name='prewarm', daemon=True)
+    thread.start()
+    return thread
+
+# One figure cache per server process, shared by every session
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(FIGURE_CACHE_MB * 1024 * 1024)
+
+# Likewise for the group-by counts behind the charts, across every loaded store
+@st.cache_resource
+def get_aggregate_cache():
+    return AggregateCache(AGGREGATE_CACHE_MB * 1024 * 1024, os.path.join(CACHE_DIR, 'aggregates'),
+                          max_disk_bytes=AGGREGATE_DISK_MB * 1024 * 1024,
+                          min_disk_seconds=AGGREGATE_DISK_MIN_MS / 1000)
+
+# Shared by every session; the builds themselves only read the store and figure cache
+@st.cache_resource
+def get_figure_pool():
+    return ThreadPoolExecutor(FIGURE_THREADS, thread_name_prefix='figure')
+
+# Charts waiting on the figure pool in the current rerun, or None to build in place
+_pending_figures = contextvars.ContextVar('pending_figures', default=None)
+
+@contextmanager
+def concurrent_figures():
+    """
+    Build the charts drawn inside the block concurrently on the figure pool.
+    Each chart holds its place with an empty slot, and the slots are filled in
+    page order once the block is done. If the block raises (including
+    Streamlit's rerun and stop), builds not yet started are cancelled instead.
+    """
+    if FIGURE_THREADS <= 1:
+        yield
+        return
+    pending = []
+    token = _pending_figures.set(pending)
+    try:
+        yield
+    except BaseException:
+        for _, _, future in pending:
+            future.cancel()
+        raise
+    finally:
+        _pending_figures.reset(token)
+    for placeholder, chart_id, future in pending:
+        with placeholder.container():
+            show_figure(chart_id, future.result())
+
+def build_figure_json(chart_id, cache, key, build_figure, exact=False):
+    """Build and serialize a figure, keeping the JSON in the figure cache"""
+    # Aggregation shows up as nested 'count' spans, the rest is figure construction
+    with span(f'build {chart_id}', 'figure'), approx.recording() as estimates, \
+            (approx.exact() if exact else nullcontext()):
+        figure = build_figure()
+    # Charts drawn from sampled counts say so, with their error bound
+    note = approx.describe(estimates)
+    if note:
+        figure.add_annotation(text=note, xref='paper', yref='paper', x=1, y=1, xanchor='right',
+                              yanchor='bottom', showarrow=False, font=dict(size=11, color='gray'))
+    with span(f'serialize {chart_id}', 'serialize'):
+        figure_json = figure.to_json()
+    cache.put(key, figure_json)
+    return figure_json
+
+def show_figure(chart_id, figure_json):
+    size_kb = round(len(figure_json) / 1024, 1)
+    with span(f'render {chart_id}', 'render', KB=size_kb):
+        st.plotly_chart(json.loads(figure_json), use_container_width=True)
+    # Payload guard: figures should carry aggregates, never one point per row
+    if size_kb > FIGURE_PAYLOAD_WARN_KB:
+        st.warning(f"This chart sends {size_kb:,.0f} KB to the browser "
+                   f"(guard: {FIGURE_PAYLOAD_WARN_KB:,} KB); it should be drawn from aggregated counts.")
+
+def plot_cached(chart_id, store, selections, build_figure):
+    """Show a chart, reusing its serialized figure when these filters were seen before"""
+    cache = get_figure_cache()
+    # With approximate counts on, each chart can be switched back to exact counts
+    # (read before its checkbox is drawn below the chart)
+    exact_key = f'exact/{chart_id}'
+    exact = store.sample is None or st.session_state.get(exact_key, False)
+    # The store version keeps figures drawn before new rows arrived from being reused
+    key = (chart_id, store.version, filter_key(selections), 'exact' if exact else 'approximate')
+    figure_json = cache.get(key)
+    pending = _pending_figures.get()
+    if figure_json is None and pending is not None:
+        # The worker runs in a copy of this context, so its spans join the rerun's trace
+        future = get_figure_pool().submit(contextvars.copy_context().run, build_figure_json,
+                                          chart_id, cache, key, build_figure, exact)
+        pending.append((st.empty(), chart_id, future))
+    else:
+        with span(f'chart {chart_id}', 'chart'):
+            if figure_json is None:
+                figure_json = build_figure_json(chart_id, cache, key, build_figure, exact)
+            show_figure(chart_id, figure_json)
+    if store.sample is not None:
+        st.checkbox("Exact counts", key=exact_key,
+                    help="Count every row for this chart instead of estimating from the sample")
+
+def per_counting_mode(compute):
+    """
+    Per-column counts several charts share (`compute` returns column -> counts),
+    computed on first use once per counting mode, so a chart switched to exact
+    counts does not get the shared estimates. Each chart that reads a column gets
+    that column's error bound, whichever chart's build computed it.
+    """
+    results = {}
+    lock = threading.Lock()
+    def get(column):
+        mode = approx.enabled()
+        with lock:
+            if mode not in results:
+                with approx.recording() as estimates:
+                    counts = compute()
+                results[mode] = counts, {columns[0]: (columns, estimate, half_widths)
+                                         for columns, estimate, half_widths in estimates}
+        counts, bounds = results[mode]
+        if column in bounds:
+            approx.record(*bounds[column])
+        return counts[column]
+    return get
+
+def distinct_metric(label, store, column):
+    """Metric of a column's distinct labels, marked as an estimate (with its bound) when it is one"""
+    value, half_width = store.nunique_bounds(column)
+    if half_width is None:
+        st.metric(label, value)
+    else:
+        st.metric(label, f"≈ {value:,}",
+                  help=f"Estimated from a sample (Chao1): ±{half_width:,.1f} at 95% confidence")
+
+# This rerun's sidebar-filtered store, sidebar selections and chart selections
+_cross_filter_state = contextvars.ContextVar('cross_filter_state', default=None)
+
+def chart_selections():
+    """
+    Chart (cross-filter) selections, column -> values. Kept apart from widget
+    state, which Streamlit drops while a widget is not shown, so a selection made
+    in one tab keeps filtering the charts of the others.
+    """
+    return st.session_state.setdefault('cross_filters', {})
+
+def clear_chart_selections():
+    for column in CROSS_FILTER_COLUMNS:
+        st.session_state.pop(f'cross_filter_{column}', None)
+    st.session_state['cross_filters'] = {}
+
+def with_chart_selections(selections, cross):
+    # Figure cache key: sidebar selections plus chart selections, named apart
+    return dict(selections, **{f'{column} (chart)': values for column, values in cross.items()})
+
+def cross_filter_view(column):
+    """
+    Store, cache-key selections and selected values for the chart that selects
+    `column`: it is filtered by everything except its own selection, which it
+    highlights instead. The filter is a bitmap index lookup and the counts come
+    from the count cube or the aggregate cache, so a new selection only
+    recomputes the charts it affects.
+    """
+    base, selections, cross = _cross_filter_state.get()
+    others = {other: values for other, values in cross.items() if other != column}
+    selected = cross.get(column, [])
+    key_selections = with_chart_selections(selections, others)
+    key_selections[f'{column} (highlight)'] = selected
+    return aggregations.apply_filters(base, others), key_selections, selected
+
+def cross_filter_control(column, store):
+    """Selector for the marks of the chart above; the selection filters every other chart"""
+    key = f'cross_filter_{column}'
+    def update():
+        chart_selections()[column] = st.session_state[key]
+    options = store.labels(column)
+    st.multiselect(f"Filter the other charts by {column}", options,
+                   default=[value for value in chart_selections().get(column, []) if value in options],
+                   key=key, on_change=update, placeholder='Select to cross-filter')
+
+def highlight_selection(fig, selected):
+    """Dim the bars, pull out the pie slices or outline the states that are not selected"""
+    if not selected:
+        return fig
+    selected = set(selected)
+    for trace in fig.data:
+        if trace.type == 'bar':
+            trace.marker.opacity = [1.0 if label in selected else 0.3 for label in trace.x]
+        elif trace.type == 'pie':
+            trace.pull = [0.12 if label in selected else 0 for label in trace.labels]
+        elif trace.type == 'choroplethmapbox':
+            selected_keys = set(STATE_NAME_INDEX.keys(list(selected)))
+            trace.marker.line.width = [4 if key in selected_keys else 1
+                                       for key in STATE_NAME_INDEX.keys(list(trace.locations))]
+    return fig
+
+def show_timings(trace):
+    """Sidebar switch and panel for this rerun's timing spans, with a Chrome trace download"""
+    st.sidebar.toggle("Show timings", key='debug_timings',
+                      help="Time data loading, filtering and every chart on each rerun")
+    if trace is None:
+        return
+    if TRACE_DIR:
+        trace.write(TRACE_DIR)
+    if st.session_state.get('debug_timings'):
+        with st.sidebar.expander("Timings", expanded=True):
+            stats = get_aggregate_cache().stats()
+            st.caption(f"Aggregate cache: {stats['hit_rate']:.0%} hit rate "
+                       f"({stats['hits']:,} hits, {stats['misses']:,} misses), "
+                       f"{stats['entries']:,} entries, {stats['bytes'] / 2**20:.1f} of "
+                       f"{stats['max_bytes'] / 2**20:.0f} MB, {stats['evictions']:,} evictions")
+            st.dataframe(pd.DataFrame(trace.summary()), hide_index=True, use_container_width=True)
+            st.download_button("Download Chrome trace", json.dumps(trace.to_chrome()),
+                               file_name='trace.json', mime='application/json')
 
 # Load the India state GeoJSON data
 @st.cache_data
@@ -44,6 +429,14 @@ def load_geojson():
     st.warning("No GeoJSON file found. Creating simplified state boundaries for visualization.")
     return create_simplified_geojson()
 
+@st.cache_data
+def load_geojson_level(level):
+    """State boundaries simplified to a detail level ('coarse', 'medium' or 'fine')"""
+    india_geojson = load_geojson()
+    # Key the on-disk cache by the boundaries' content, so a new file is re-simplified
+    source_key = hashlib.sha1(json.dumps(india_geojson, sort_keys=True).encode()).hexdigest()[:16]
+    return load_simplified(india_geojson, level, GEO_CACHE_DIR, source_key)
+
 @st.cache_data
 def create_simplified_geojson():
     """Create a simplified GeoJSON with state boundaries when the proper file can't be loaded"""
@@ -153,13 +546,14 @@ state_coordinates = {
     'Goa': {'lat': 15.2993, 'lon': 74.1240}
 }
 
-def create_choropleth_map(df):
+def create_choropleth_map(store, zoom=MAP_ZOOM, india_geojson=None):
     """
     Create a choropleth map showing accident counts by state with color gradient
-    (red for most accidents, blue for least accidents)
+    (red for most accidents, blue for least accidents). Boundaries are sent at
+    the detail level that matches `zoom`, unless given as `india_geojson`.
     """
     # Group data by State to get accident counts
-    state_counts = df.groupby('State').size().reset_index(name='Accident_Count')
+    state_counts = aggregations.state_counts(store)
     
     # Add min and max for reference in the hover data
     min_accidents = state_counts['Accident_Count'].min()
@@ -167,8 +561,9 @@ def create_choropleth_map(df):
     state_counts['Min'] = min_accidents
     state_counts['Max'] = max_accidents
     
-    # Load India state GeoJSON with proper boundaries
-    india_geojson = load_geojson()
+    # Load India state boundaries, simplified to the map's zoom
+    if india_geojson is None:
+        india_geojson = load_geojson_level(level_for_zoom(zoom))
     
     # Check the property name that contains state names in the GeoJSON
     feature_key = "name"
@@ -180,37 +575,6 @@ def create_choropleth_map(df):
                 feature_key = key
                 break
     
-    # Create state name mapping to handle potential differences
-    state_mapping = {}
-    states_in_data = set(state_counts['State'].unique())
-    
-    # Create a mapping function to match state names in data with GeoJSON
-    def map_state_names(state_name):
-        # Common variations in state names
-        variations = {
-            "Delhi": ["NCT of Delhi", "Delhi", "National Capital Territory of Delhi"],
-            "Jammu and Kashmir": ["Jammu & Kashmir", "J&K", "Jammu & Kashmir"],
-            "Andaman and Nicobar Islands": ["A & N Islands", "Andaman & Nicobar", "Andaman & Nicobar Islands"],
-            "Dadra and Nagar Haveli": ["Dadra & Nagar Haveli", "DNH"],
-            "Daman and Diu": ["Daman & Diu"],
-            "Tamil Nadu": ["Tamilnadu"],
-            "Puducherry": ["Pondicherry"],
-            "Odisha": ["Orissa"],
-            "Uttarakhand": ["Uttaranchal"],
-            "Telangana": ["Telengana"]
-        }
-        
-        # Try variations if available
-        if state_name in variations:
-            return variations[state_name]
-        
-        # Otherwise return just the original name
-        return [state_name]
-    
-    # Map data state names to possible GeoJSON state names
-    for state in states_in_data:
-        state_mapping[state] = map_state_names(state)
-    
     # Get all available states from GeoJSON to ensure full India outline is shown
     geojson_states = []
     if india_geojson and "features" in india_geojson:
@@ -218,28 +582,23 @@ def create_choropleth_map(df):
             if "properties" in feature and feature_key in feature["properties"]:
                 geojson_states.append(feature["properties"][feature_key])
     
-    # Create a complete dataset with all states, including those with no data
-    complete_state_data = []
-    for state in geojson_states:
-        state_data = state_counts[state_counts['State'] == state]
-        if len(state_data) > 0:
-            # State exists in our data
-            complete_state_data.append(state_data.iloc[0].to_dict())
-        else:
-            # State doesn't exist in our data, add with count 0
-            complete_state_data.append({
-                'State': state,
-                'Accident_Count': 0,
-                'Min': min_accidents,
-                'Max': max_accidents
-            })
-    
-    # Convert to DataFrame
-    complete_df = pd.DataFrame(complete_state_data)
+    # Join counts to features on canonical state keys, so spelling variants such as
+    # 'Orissa' or 'NCT of Delhi' match the dataset; features without data get 0
+    features_df = pd.DataFrame({'State': geojson_states})
+    features_df['key'] = STATE_NAME_INDEX.keys(features_df['State'])
+    counts_by_key = state_counts.assign(key=STATE_NAME_INDEX.keys(state_counts['State']))
+    counts_by_key = counts_by_key.groupby('key', as_index=False)['Accident_Count'].sum()
+    complete_df = features_df.merge(counts_by_key, on='key', how='left').drop(columns='key')
+    complete_df['Accident_Count'] = complete_df['Accident_Count'].fillna(0).astype(int)
+    complete_df['Min'] = min_accidents
+    complete_df['Max'] = max_accidents
     
     # Only use non-zero values for color range to ensure proper gradient
     non_zero_min = complete_df[complete_df['Accident_Count'] > 0]['Accident_Count'].min()
     non_zero_max = complete_df['Accident_Count'].max()
+    if not non_zero_max:
+        # No state has accidents: keep the scale valid, every state is drawn white
+        non_zero_min = non_zero_max = 1
     
     # Create the choropleth map
     fig = px.choropleth_mapbox(
@@ -255,7 +614,7 @@ def create_choropleth_map(df):
         ],
         range_color=[0, non_zero_max],  # Set the range from 0 to max accidents
         mapbox_style="carto-positron",
-        zoom=3.8,
+        zoom=zoom,
         center={"lat": 22.5937, "lon": 78.9629},  # Center of India
         opacity=0.85,
         labels={'Accident_Count': 'Number of Accidents'},
@@ -284,7 +643,7 @@ def create_choropleth_map(df):
         ),
         mapbox=dict(
             style="carto-positron",
-            zoom=3.8,
+            zoom=zoom,
             center={"lat": 22.5937, "lon": 78.9629}
         )
     )
@@ -292,82 +651,70 @@ def create_choropleth_map(df):
     return fig, state_counts
 
 
-# Main function
-def main():
-    st.title("Industrial Accidents Analysis Dashboard")
+# Overview Tab with all graphs
+def render_overview(store, selections):
+    selected_states = selections['State']
+    st.header("Overview")
     
-    # Load data
-    df = load_data()
+    # Every Overview count comes from a single pass over the filtered data
+    overview_counts = per_counting_mode(lambda: aggregations.overview_counts(store))
     
-    # Sidebar filters
-    st.sidebar.header("Filters")
-    
-    # State filter
-    all_states = ['All'] + sorted(df['State'].unique().tolist())
-    selected_state = st.sidebar.selectbox('Select State', all_states)
-    
-    # Accident Severity filter
-    all_severities = ['All'] + sorted(df['Accident Severity'].unique().tolist())
-    selected_severity = st.sidebar.selectbox('Select Accident Severity', all_severities)
-    
-    # Apply filters
-    if selected_state != 'All':
-        df = df[df['State'] == selected_state]
-    if selected_severity != 'All':
-        df = df[df['Accident Severity'] == selected_severity]
-    
-    # Create tabs
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "Overview", "Temporal Analysis", "Geographic Analysis", 
-        "Industry Analysis", "Demographic Analysis", "Risk Analysis",
-        "Conclusions"
-    ])
-    
-    # Overview Tab with all graphs
-    with tab1:
-        st.header("Overview")
-        
-        # Summary metrics
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Accidents", len(df))
+    # Summary metrics (distinct counts are estimated too with approximate counts on,
+    # and can be switched to exact like a chart)
+    exact_metrics = store.sample is not None and st.session_state.get('exact/overview/metrics', False)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Accidents", len(store))
+    with approx.exact() if exact_metrics else nullcontext():
         with col2:
-            st.metric("Total States", df['State'].nunique())
+            distinct_metric("Total States", store, 'State')
         with col3:
-            st.metric("Total Industry Sectors", df['Industry Sector'].nunique())
-        
-        # Year-wise accidents - Bar chart
-        st.subheader("Accidents by Year")
-        year_counts = df['Year'].value_counts().sort_index()
+            distinct_metric("Total Industry Sectors", store, 'Industry Sector')
+    if store.sample is not None:
+        st.checkbox("Exact counts", key='exact/overview/metrics',
+                    help="Count every row for these totals instead of estimating from the sample")
+    
+    # Year-wise accidents - Bar chart
+    st.subheader("Accidents by Year")
+    def build_year():
+        year_counts = overview_counts('Year').sort_index()
         fig_year = px.bar(x=year_counts.index, y=year_counts.values, 
                          labels={'x': 'Year', 'y': 'Number of Accidents'},
                          title='Trend of Accidents Over Years',
                          color=year_counts.values,
                          color_continuous_scale='Viridis')
-        st.plotly_chart(fig_year, use_container_width=True)
-        
-        # Day of Week accidents - Pie chart
-        st.subheader("Accidents by Day of Week")
-        day_counts = df['DayOfWeek'].value_counts()
+        return fig_year
+    plot_cached('overview/year', store, selections, build_year)
+    
+    # Day of Week accidents - Pie chart
+    st.subheader("Accidents by Day of Week")
+    def build_day():
+        day_counts = overview_counts('DayOfWeek')
         fig_day = px.pie(values=day_counts.values, names=day_counts.index,
                         title='Distribution of Accidents by Day of Week',
                         color_discrete_sequence=px.colors.qualitative.Set3)
-        st.plotly_chart(fig_day, use_container_width=True)
-        
-        # Shift-wise accidents - Bar chart with colors
-        st.subheader("Accidents by Shift")
-        shift_counts = df['Shift'].value_counts()
+        return fig_day
+    plot_cached('overview/day', store, selections, build_day)
+    
+    # Shift-wise accidents - Bar chart with colors
+    st.subheader("Accidents by Shift")
+    shift_store, shift_selections, shift_selected = cross_filter_view('Shift')
+    def build_shift():
+        shift_counts = shift_store.value_counts('Shift')
         fig_shift = px.bar(x=shift_counts.index, y=shift_counts.values,
                           labels={'x': 'Shift', 'y': 'Number of Accidents'},
                           title='Accidents Distribution by Shift',
                           color=shift_counts.index,
                           color_discrete_sequence=px.colors.qualitative.Pastel)
-        st.plotly_chart(fig_shift, use_container_width=True)
-        
-        # State-wise accidents - Scatter map
-        st.subheader("Accidents by State")
-        state_counts = df['State'].value_counts()
-        
+        return highlight_selection(fig_shift, shift_selected)
+    plot_cached('overview/shift', shift_store, shift_selections, build_shift)
+    cross_filter_control('Shift', shift_store)
+    
+    # State-wise accidents - Scatter map
+    st.subheader("Accidents by State")
+    def build_state():
+        state_counts = overview_counts('State')
+    
         # Create a DataFrame with state coordinates and accident counts
         map_data = []
         for state, count in state_counts.items():
@@ -379,9 +726,9 @@ def main():
                     'Latitude': coords['lat'],
                     'Longitude': coords['lon']
                 })
-        
+    
         map_df = pd.DataFrame(map_data)
-        
+    
         # Create a custom color scale from light green to dark red
         custom_colorscale = [
             [0.0, '#90EE90'],  # Light green
@@ -391,15 +738,15 @@ def main():
             [0.8, '#DC143C'],  # Crimson
             [1.0, '#8B0000']   # Dark red
         ]
-        
+    
         # Create the scatter map with dynamic sizing
         fig_state = go.Figure()
-        
+    
         # Calculate min and max accidents for color scaling from the full dataset
-        full_df = load_data()  # Get the full dataset for color scale
-        min_accidents = min(full_df['State'].value_counts())
-        max_accidents = max(full_df['State'].value_counts())
-        
+        full_store = store.unfiltered()  # Get the full dataset for color scale
+        min_accidents = min(full_store.value_counts('State'))
+        max_accidents = max(full_store.value_counts('State'))
+    
         # Add the scatter points with dynamic sizing
         fig_state.add_trace(go.Scattermapbox(
             lat=map_df['Latitude'],
@@ -430,10 +777,10 @@ def main():
             hoverinfo='text',
             name='Accidents'
         ))
-        
+    
         # Add selected state with different color if filter is applied
-        if selected_state != 'All':
-            selected_state_data = map_df[map_df['State'] == selected_state]
+        if selected_states:
+            selected_state_data = map_df[map_df['State'].isin(selected_states)]
             if not selected_state_data.empty:
                 fig_state.add_trace(go.Scattermapbox(
                     lat=selected_state_data['Latitude'],
@@ -454,7 +801,7 @@ def main():
                     hoverinfo='text',
                     name='Selected State'
                 ))
-        
+    
         fig_state.update_layout(
             mapbox_style="carto-positron",
             mapbox_zoom=4,
@@ -463,54 +810,68 @@ def main():
             title='Accidents Distribution by State',
             showlegend=True
         )
-        
-        st.plotly_chart(fig_state, use_container_width=True)
-        
-        # Industry Sector accidents - Bar chart
-        st.subheader("Accidents by Industry Sector")
-        sector_counts = df['Industry Sector'].value_counts()
+        return fig_state
+    plot_cached('overview/state', store, selections, build_state)
+    
+    # Industry Sector accidents - Bar chart
+    st.subheader("Accidents by Industry Sector")
+    sector_store, sector_selections, sector_selected = cross_filter_view('Industry Sector')
+    def build_sector():
+        sector_counts = sector_store.value_counts('Industry Sector')
         fig_sector = px.bar(x=sector_counts.index, y=sector_counts.values,
                            labels={'x': 'Industry Sector', 'y': 'Number of Accidents'},
                            title='Accidents Distribution by Industry Sector',
                            color=sector_counts.index,
                            color_discrete_sequence=px.colors.qualitative.Bold)
-        st.plotly_chart(fig_sector, use_container_width=True)
-        
-        # Accident Severity - Donut chart
-        st.subheader("Accidents by Severity")
-        severity_counts = df['Accident Severity'].value_counts()
+        return highlight_selection(fig_sector, sector_selected)
+    plot_cached('overview/sector', sector_store, sector_selections, build_sector)
+    cross_filter_control('Industry Sector', sector_store)
+    
+    # Accident Severity - Donut chart
+    st.subheader("Accidents by Severity")
+    severity_store, severity_selections, severity_selected = cross_filter_view('Accident Severity')
+    def build_severity():
+        severity_counts = severity_store.value_counts('Accident Severity')
         fig_severity = px.pie(values=severity_counts.values, names=severity_counts.index,
                              title='Distribution of Accident Severity',
                              hole=0.4,
                              color_discrete_sequence=px.colors.qualitative.Set2)
-        st.plotly_chart(fig_severity, use_container_width=True)
-        
-        # Accident Type - Bar chart with colors
-        st.subheader("Accidents by Type")
-        type_counts = df['Accident Type'].value_counts()
+        return highlight_selection(fig_severity, severity_selected)
+    plot_cached('overview/severity', severity_store, severity_selections, build_severity)
+    cross_filter_control('Accident Severity', severity_store)
+    
+    # Accident Type - Bar chart with colors
+    st.subheader("Accidents by Type")
+    type_store, type_selections, type_selected = cross_filter_view('Accident Type')
+    def build_type():
+        type_counts = type_store.value_counts('Accident Type')
         fig_type = px.bar(x=type_counts.index, y=type_counts.values,
                          labels={'x': 'Accident Type', 'y': 'Number of Accidents'},
                          title='Distribution of Accident Types',
                          color=type_counts.index,
                          color_discrete_sequence=px.colors.qualitative.Prism)
-        st.plotly_chart(fig_type, use_container_width=True)
-        
-        # Gender distribution - Pie chart
-        st.subheader("Accidents by Gender")
-        gender_counts = df['Gender'].value_counts()
+        return highlight_selection(fig_type, type_selected)
+    plot_cached('overview/type', type_store, type_selections, build_type)
+    cross_filter_control('Accident Type', type_store)
+    
+    # Gender distribution - Pie chart
+    st.subheader("Accidents by Gender")
+    gender_store, gender_selections, gender_selected = cross_filter_view('Gender')
+    def build_gender():
+        gender_counts = gender_store.value_counts('Gender')
         fig_gender = px.pie(values=gender_counts.values, names=gender_counts.index,
                            title='Gender Distribution in Accidents',
                            color_discrete_sequence=['#FF9999', '#66B2FF'])
-        st.plotly_chart(fig_gender, use_container_width=True)
-        
-        # Age distribution - Bar chart
-        st.subheader("Accidents by Age")
-        # Create age ranges with 5-year intervals
-        bins = list(range(18, 66, 5))
-        labels = [f'{i}-{i+4}' for i in range(18, 61, 5)]
-        df['Age Range'] = pd.cut(df['Age'], bins=bins, labels=labels, right=False)
-        age_counts = df['Age Range'].value_counts().sort_index()
-        
+        return highlight_selection(fig_gender, gender_selected)
+    plot_cached('overview/gender', gender_store, gender_selections, build_gender)
+    cross_filter_control('Gender', gender_store)
+    
+    # Age distribution - Bar chart
+    st.subheader("Accidents by Age")
+    def build_age():
+        # Age ranges are binned once at load (see aggregations.AGE_BINS)
+        age_counts = aggregations.age_counts(store, overview_counts('Age Range'))
+    
         # Create a custom color scale with more variation
         custom_age_colorscale = [
             [0.0, '#440154'],  # Dark purple
@@ -520,37 +881,41 @@ def main():
             [0.8, '#FDE725'],  # Yellow
             [1.0, '#FF0000']   # Red
         ]
-        
+    
         fig_age = px.bar(x=age_counts.index, y=age_counts.values,
                         labels={'x': 'Age Range', 'y': 'Number of Accidents'},
                         title='Age Distribution of Accidents (Working Age)',
                         color=age_counts.values,
                         color_continuous_scale=custom_age_colorscale)
-        st.plotly_chart(fig_age, use_container_width=True)
-        
-        # Employee Type - Bar chart with colors
-        st.subheader("Accidents by Employee Type")
-        emp_counts = df['Employee Type'].value_counts()
+        return fig_age
+    plot_cached('overview/age', store, selections, build_age)
+    
+    # Employee Type - Bar chart with colors
+    st.subheader("Accidents by Employee Type")
+    def build_emp():
+        emp_counts = overview_counts('Employee Type')
         fig_emp = px.bar(x=emp_counts.index, y=emp_counts.values,
                         labels={'x': 'Employee Type', 'y': 'Number of Accidents'},
                         title='Accidents by Employee Type',
                         color=emp_counts.index,
                         color_discrete_sequence=px.colors.qualitative.Vivid)
-        st.plotly_chart(fig_emp, use_container_width=True)
-        
-        # # Critical Risk - Bar chart
-        # st.subheader("Accidents by Critical Risk")
-        # risk_counts = df['Critical Risk'].value_counts()
-        # fig_risk = px.bar(x=risk_counts.index, y=risk_counts.values,
-        #                  labels={'x': 'Critical Risk', 'y': 'Number of Accidents'},
-        #                  title='Distribution of Critical Risks',
-        #                  color=risk_counts.index,
-        #                  color_discrete_sequence=px.colors.qualitative.Dark24)
-        # st.plotly_chart(fig_risk, use_container_width=True)
-        
-        # Safety Gear - Segmented Pie chart
-        st.subheader("Accidents by Safety Gear")
-        gear_counts = df['Safety Gear'].value_counts()
+        return fig_emp
+    plot_cached('overview/emp', store, selections, build_emp)
+    
+    # # Critical Risk - Bar chart
+    # st.subheader("Accidents by Critical Risk")
+    # risk_counts = store.value_counts('Critical Risk')
+    # fig_risk = px.bar(x=risk_counts.index, y=risk_counts.values,
+    #                  labels={'x': 'Critical Risk', 'y': 'Number of Accidents'},
+    #                  title='Distribution of Critical Risks',
+    #                  color=risk_counts.index,
+    #                  color_discrete_sequence=px.colors.qualitative.Dark24)
+    # st.plotly_chart(fig_risk, use_container_width=True)
+    
+    # Safety Gear - Segmented Pie chart
+    st.subheader("Accidents by Safety Gear")
+    def build_gear():
+        gear_counts = overview_counts('Safety Gear')
         fig_gear = go.Figure(data=[go.Pie(
             labels=gear_counts.index,
             values=gear_counts.values,
@@ -563,71 +928,62 @@ def main():
             title='Safety Gear Usage in Accidents',
             showlegend=True
         )
-        st.plotly_chart(fig_gear, use_container_width=True)
+        return fig_gear
+    plot_cached('overview/gear', store, selections, build_gear)
+
+# Temporal Analysis Tab
+def render_temporal(store, selections):
+    selected_severities = selections['Accident Severity']
+    st.header("Temporal Analysis")
     
-    # Temporal Analysis Tab
-    with tab2:
-        st.header("Temporal Analysis")
-        
-        # 1. Year-Month Heatmap
-        st.subheader("Accidents by Year and Month")
-        # Create month order for proper sorting
-        month_order = ['January', 'February', 'March', 'April', 'May', 'June', 
-                      'July', 'August', 'September', 'October', 'November', 'December']
-        # Create pivot table with month names
-        heatmap_data = df.pivot_table(index='Year', columns='Month', values='Accident Type', aggfunc='count')
-        # Reorder columns according to month_order
-        heatmap_data = heatmap_data[month_order]
+    # 1. Year-Month Heatmap
+    st.subheader("Accidents by Year and Month")
+    def build_heatmap():
+        # Year x Month counts, months in calendar order
+        heatmap_data = aggregations.year_month(store)
         fig_heatmap = px.imshow(heatmap_data, 
                                labels=dict(x="Month", y="Year", color="Number of Accidents"),
                                title="Accident Frequency Heatmap by Year and Month",
                                color_continuous_scale=['yellow', 'red'])  # Yellow for low, Red for high
-        st.plotly_chart(fig_heatmap, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Identifies seasonal patterns in accidents
-        - Shows peak months for industrial accidents
-        - Helps in planning preventive measures during high-risk periods
-        """)
-        
-        # 2. Day of Week vs Shift Analysis
-        st.subheader("Accidents by Day and Shift")
-        # Define the correct order for days of the week
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        # Ensure DayOfWeek is a categorical type with the correct order
-        df['DayOfWeek'] = pd.Categorical(df['DayOfWeek'], categories=day_order, ordered=True)
-        pivot_data = df.pivot_table(index='DayOfWeek', columns='Shift', values='Accident Type', aggfunc='count').reindex(day_order)
+        return fig_heatmap
+    plot_cached('temporal/heatmap', store, selections, build_heatmap)
+    st.markdown("""
+    **Insights:**
+    - Identifies seasonal patterns in accidents
+    - Shows peak months for industrial accidents
+    - Helps in planning preventive measures during high-risk periods
+    """)
+    
+    # 2. Day of Week vs Shift Analysis
+    st.subheader("Accidents by Day and Shift")
+    def build_pivot():
+        # Day x Shift counts, days in week order
+        pivot_data = aggregations.day_shift(store)
         fig_pivot = px.imshow(pivot_data,
                              labels=dict(x="Shift", y="Day of Week", color="Number of Accidents"),
                              title="Accident Distribution by Day and Shift",
                              color_continuous_scale='Plasma')
-        st.plotly_chart(fig_pivot, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Reveals most dangerous shift-day combinations
-        - Helps in optimizing work schedules
-        - Identifies patterns in shift-related accidents
-        """)
-        
-        # 3. Hour Type Distribution
-        st.subheader("Accidents by Hour Type")
-        
-        if selected_severity == 'All':
+        return fig_pivot
+    plot_cached('temporal/pivot', store, selections, build_pivot)
+    st.markdown("""
+    **Insights:**
+    - Reveals most dangerous shift-day combinations
+    - Helps in optimizing work schedules
+    - Identifies patterns in shift-related accidents
+    """)
+    
+    # 3. Hour Type Distribution
+    st.subheader("Accidents by Hour Type")
+    def build_hour():
+    
+        if not selected_severities:
             # Calculate percentages based on total accidents when 'All' is selected
-            total_accidents = len(df)
-            hour_counts = df['Hour Type'].value_counts()
-            hour_percentages = (hour_counts / total_accidents) * 100
-            
-            # Create DataFrame for plotting
-            hour_data = pd.DataFrame({
-                'Hour Type': hour_counts.index,
-                'Count': hour_counts.values,
-                'Percentage': hour_percentages.values
-            })
-            
+            total_accidents = len(store)
+            hour_data = aggregations.hour_type_share(store)
+        
             # Create color mapping dictionary
             color_map = {'Working Hour': '#3498DB', 'Over Time': '#E67E22'}  # Blue for Working Hour, Orange for Over Time
-            
+        
             # Create the bar chart
             fig_hour = px.bar(hour_data,
                             x='Hour Type',
@@ -638,34 +994,26 @@ def main():
                             color='Hour Type',
                             color_discrete_map=color_map)  # Use fixed color mapping
             fig_hour.update_traces(textposition='outside')
-            
+        
         else:
-            # Filter data for the selected severity
-            severity_data = df[df['Accident Severity'] == selected_severity]
-            
-            # Calculate counts and percentages for each hour type
-            hour_type_data = severity_data['Hour Type'].value_counts().reset_index()
-            hour_type_data.columns = ['Hour Type', 'Count']
-            
-            # Calculate total for this severity
+            # Counts and percentages for each hour type (data is already filtered by severity)
+            hour_type_data = aggregations.hour_type_share(store)
             severity_total = hour_type_data['Count'].sum()
-            
-            # Calculate percentages
-            hour_type_data['Percentage'] = (hour_type_data['Count'] / severity_total * 100).round(1)
-            
+            hour_type_data['Percentage'] = hour_type_data['Percentage'].round(1)
+        
             # Create color mapping dictionary
             color_map = {'Working Hour': '#3498DB', 'Over Time': '#E67E22'}  # Blue for Working Hour, Orange for Over Time
-            
+        
             # Create the bar chart
             fig_hour = px.bar(hour_type_data,
                             x='Hour Type',
                             y='Count',
                             text=[f'{count} ({pct}%)' for count, pct in zip(hour_type_data['Count'], hour_type_data['Percentage'])],
                             labels={'x': 'Hour Type', 'y': 'Number of Accidents'},
-                            title=f'Accident Distribution by Hour Type (Severity: {selected_severity}, Total: {severity_total})',
+                            title=f'Accident Distribution by Hour Type (Severity: {", ".join(selected_severities)}, Total: {severity_total})',
                             color='Hour Type',
                             color_discrete_map=color_map)  # Use fixed color mapping
-            
+        
             # Ensure y-axis starts at 0 and has enough room for labels
             max_count = hour_type_data['Count'].max()
             fig_hour.update_layout(
@@ -676,95 +1024,107 @@ def main():
                 )
             )
             fig_hour.update_traces(textposition='outside')
-        
-        st.plotly_chart(fig_hour, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - When 'All' is selected: Shows overall percentage distribution across hour types
-        - When specific severity is selected: Shows counts and percentages within that severity level
-        - Helps in understanding accident patterns during different work periods
-        """)
-        
-        # 4. Shift vs Severity Analysis
-        st.subheader("Accidents by Shift & Severity")
-        if not df.empty:
-            shift_fig = px.histogram(df, x='Shift', color='Accident Severity', 
-                                   barmode='group', 
-                                   title='Distribution of Accidents by Shift and Severity',
-                                   labels={'Shift': 'Shift', 'count': 'Number of Accidents'})
-            shift_fig.update_layout(xaxis_title='Shift', yaxis_title='Number of Accidents')
-            st.plotly_chart(shift_fig, use_container_width=True)
-            st.markdown("""
-            **Insights:**
-            - Shows the distribution of accident severity across different shifts
-            - Helps identify which shifts have higher proportions of severe accidents
-            - Useful for shift-specific safety planning
-            """)
-        else:
-            st.write("No data available for the selected filters.")
+        return fig_hour
+    plot_cached('temporal/hour', store, selections, build_hour)
+    st.markdown("""
+    **Insights:**
+    - When 'All' is selected: Shows overall percentage distribution across hour types
+    - When specific severity is selected: Shows counts and percentages within that severity level
+    - Helps in understanding accident patterns during different work periods
+    """)
     
-    # Geographic Analysis Tab
-    with tab3:
-        st.header("Geographic Analysis")
-        
-        # Add the Choropleth map from indian_accidents_geo_analysis.py
-        st.subheader("Accident Distribution by State (Heat Map)")
-        choropleth_map, state_counts = create_choropleth_map(df)
-        st.plotly_chart(choropleth_map, use_container_width=True)
-        
+    # 4. Shift vs Severity Analysis
+    st.subheader("Accidents by Shift & Severity")
+    if len(store) > 0:
+        def build_shift_severity():
+            # Counted here rather than by the browser from one point per row
+            shift_fig = px.bar(aggregations.shift_severity(store), x='Shift', y='Count',
+                               color='Accident Severity', barmode='group',
+                               title='Distribution of Accidents by Shift and Severity',
+                               labels={'Shift': 'Shift', 'Count': 'Number of Accidents'})
+            shift_fig.update_layout(xaxis_title='Shift', yaxis_title='Number of Accidents')
+            return shift_fig
+        plot_cached('temporal/shift_severity', store, selections, build_shift_severity)
         st.markdown("""
         **Insights:**
-        - The heat map shows state-wise accident intensity with red indicating higher accident counts and blue indicating lower counts.
-        - States with the highest industrial accident counts are shown in darker red.
-        - White areas indicate states with no recorded accidents in the dataset.
-        - The visualization helps identify regional patterns and state-specific risk levels.
-        - This map can guide resource allocation for safety programs based on geographic need.
+        - Shows the distribution of accident severity across different shifts
+        - Helps identify which shifts have higher proportions of severe accidents
+        - Useful for shift-specific safety planning
         """)
+    else:
+        st.write("No data available for the selected filters.")
 
-        
-        # 1. State vs Industry Sector
-        st.subheader("State and Industry Sector Distribution")
-        state_sector = df.groupby(['State', 'Industry Sector']).size().reset_index(name='Count')
+# Geographic Analysis Tab
+def render_geographic(store, selections):
+    st.header("Geographic Analysis")
+    
+    # Add the Choropleth map from indian_accidents_geo_analysis.py
+    st.subheader("Accident Distribution by State (Heat Map)")
+    map_zoom = st.slider("Map zoom", min_value=3.0, max_value=8.0, value=MAP_ZOOM, step=0.2,
+                         help="Closer zooms load more detailed state boundaries")
+    # Boundaries are loaded here, as the map may be built off the script thread
+    india_geojson = load_geojson_level(level_for_zoom(map_zoom))
+    map_store, map_selections, map_selected = cross_filter_view('State')
+    def build_choropleth():
+        choropleth_map, state_counts = create_choropleth_map(map_store, zoom=map_zoom,
+                                                             india_geojson=india_geojson)
+        return highlight_selection(choropleth_map, map_selected)
+    plot_cached(f'geographic/choropleth@{map_zoom}', map_store, map_selections, build_choropleth)
+    cross_filter_control('State', map_store)
+    
+    st.markdown("""
+    **Insights:**
+    - The heat map shows state-wise accident intensity with red indicating higher accident counts and blue indicating lower counts.
+    - States with the highest industrial accident counts are shown in darker red.
+    - White areas indicate states with no recorded accidents in the dataset.
+    - The visualization helps identify regional patterns and state-specific risk levels.
+    - This map can guide resource allocation for safety programs based on geographic need.
+    """)
+
+    
+    # 1. State vs Industry Sector
+    st.subheader("State and Industry Sector Distribution")
+    def build_state_sector():
+        state_sector = aggregations.state_sector(store)
         fig_state_sector = px.treemap(state_sector, path=['State', 'Industry Sector'], values='Count',
                                     title='Accident Distribution by State and Industry Sector',
                                     color='Count', color_continuous_scale='RdBu')
-        st.plotly_chart(fig_state_sector, use_container_width=True)
-        # st.markdown("""
-        # **Insights:**
-        # - Shows concentration of accidents by state and sector
-        # - Identifies high-risk state-industry combinations
-        # - Helps in targeted safety interventions
-        # """)
-        
-        
-        # Insights for the treemap
-        st.markdown(
-            """
-            <div class="insight-box">
-                <div class="insight-title">Key Geographic Distribution Insights:</div>
-                <ul>
-                    <li>The treemap visualization provides a hierarchical view of accident distribution, showing which states have the highest accident counts and the industry sectors contributing to these accidents.</li>
-                    <li>Larger blocks represent states with more accidents, while the nested blocks show the proportion of accidents by industry sector within each state.</li>
-                    <li>Manufacturing and construction sectors dominate accident counts in most industrialized states.</li>
-                    <li>Some states show unique industry-specific patterns that require targeted safety interventions.</li>
-                    <li>The color intensity indicates accident frequency, helping to identify the most critical state-industry combinations for safety focus.</li>
-                </ul>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+        return fig_state_sector
+    plot_cached('geographic/state_sector', store, selections, build_state_sector)
+    # st.markdown("""
+    # **Insights:**
+    # - Shows concentration of accidents by state and sector
+    # - Identifies high-risk state-industry combinations
+    # - Helps in targeted safety interventions
+    # """)
+    
+    
+    # Insights for the treemap
+    st.markdown(
+        """
+        <div class="insight-box">
+            <div class="insight-title">Key Geographic Distribution Insights:</div>
+            <ul>
+                <li>The treemap visualization provides a hierarchical view of accident distribution, showing which states have the highest accident counts and the industry sectors contributing to these accidents.</li>
+                <li>Larger blocks represent states with more accidents, while the nested blocks show the proportion of accidents by industry sector within each state.</li>
+                <li>Manufacturing and construction sectors dominate accident counts in most industrialized states.</li>
+                <li>Some states show unique industry-specific patterns that require targeted safety interventions.</li>
+                <li>The color intensity indicates accident frequency, helping to identify the most critical state-industry combinations for safety focus.</li>
+            </ul>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
 
-        # Add Severity Distribution by States
-        st.subheader("Severity Distribution by States")
-        # Calculate severity distribution for each state
-        severity_state = df.groupby(['State', 'Accident Severity']).size().reset_index(name='Count')
-        # Calculate percentage within each state
-        total_by_state = severity_state.groupby('State')['Count'].transform('sum')
-        severity_state['Percentage'] = (severity_state['Count'] / total_by_state * 100).round(1)
-        
+    # Add Severity Distribution by States
+    st.subheader("Severity Distribution by States")
+    def build_severity_state():
+        # Severity distribution for each state, as a percentage within the state
+        severity_state = aggregations.severity_by_state(store)
+    
         # Sort states by total accidents for better visualization
-        state_order = df.groupby('State').size().sort_values(ascending=False).index
-        
+        state_order = store.value_counts('State').index
+    
         # Create the stacked bar chart
         fig_severity_state = px.bar(severity_state,
                                   x='State',
@@ -774,7 +1134,7 @@ def main():
                                   text=severity_state['Percentage'].round(1).astype(str) + '%',
                                   category_orders={'State': state_order},
                                   color_discrete_sequence=px.colors.qualitative.Set2)
-        
+    
         # Update layout for better readability
         fig_severity_state.update_layout(
             xaxis_title="State",
@@ -784,7 +1144,7 @@ def main():
             height=600,  # Increase height for better visibility
             yaxis=dict(range=[0, 100])  # Set y-axis range from 0 to 100%
         )
-        
+    
         # Update hover template to show both percentage and actual count
         fig_severity_state.update_traces(
             textposition='inside',
@@ -795,115 +1155,126 @@ def main():
                          "<extra></extra>",
             customdata=severity_state['Accident Severity']
         )
-        
-        st.plotly_chart(fig_severity_state, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows the proportion of different accident severities within each state
-        - Helps identify states with higher percentages of severe accidents
-        - Enables comparison of severity patterns across states
-        - Useful for state-specific safety policy planning
-        - Highlights states that need focused intervention for severe accident prevention
-        """)
+        return fig_severity_state
+    plot_cached('geographic/severity_state', store, selections, build_severity_state)
+    st.markdown("""
+    **Insights:**
+    - Shows the proportion of different accident severities within each state
+    - Helps identify states with higher percentages of severe accidents
+    - Enables comparison of severity patterns across states
+    - Useful for state-specific safety policy planning
+    - Highlights states that need focused intervention for severe accident prevention
+    """)
 
 
-        # 2. Local Area Analysis
-        st.subheader("Accidents by Local Area")
-        local_counts = df['Local'].value_counts().head(10)
+    # 2. Local Area Analysis
+    st.subheader("Accidents by Local Area")
+    def build_local():
+        local_counts = aggregations.top_locals(store)
         fig_local = px.bar(x=local_counts.index, y=local_counts.values,
                           labels={'x': 'Local Area', 'y': 'Number of Accidents'},
                           title='Top 10 Local Areas with Most Accidents',
                           color=local_counts.values,
                           color_continuous_scale='Viridis')
-        st.plotly_chart(fig_local, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Identifies high-risk local areas
-        - Helps in local safety planning
-        - Shows concentration of accidents in specific regions
-        """)
-        
-        # 3. State vs Accident Type
-        st.subheader("State and Accident Type Distribution")
-        state_type = df.groupby(['State', 'Accident Type']).size().reset_index(name='Count')
+        return fig_local
+    plot_cached('geographic/local', store, selections, build_local)
+    st.markdown("""
+    **Insights:**
+    - Identifies high-risk local areas
+    - Helps in local safety planning
+    - Shows concentration of accidents in specific regions
+    """)
+    
+    # 3. State vs Accident Type
+    st.subheader("State and Accident Type Distribution")
+    def build_state_type():
+        state_type = aggregations.state_type(store)
         fig_state_type = px.sunburst(state_type, path=['State', 'Accident Type'], values='Count',
                                    title='Accident Types Distribution by State',
                                    color='Count', color_continuous_scale='RdBu')
-        st.plotly_chart(fig_state_type, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows prevalent accident types in each state
-        - Helps in state-specific safety planning
-        - Identifies regional patterns in accident types
-        """)
+        return fig_state_type
+    plot_cached('geographic/state_type', store, selections, build_state_type)
+    st.markdown("""
+    **Insights:**
+    - Shows prevalent accident types in each state
+    - Helps in state-specific safety planning
+    - Identifies regional patterns in accident types
+    """)
+
+# Industry Analysis Tab
+def render_industry(store, selections):
+    st.header("Industry Analysis")
     
-    # Industry Analysis Tab
-    with tab4:
-        st.header("Industry Analysis")
-        
-        # 1. Industry Sector vs Accident Type
-        st.subheader("Industry Sector and Accident Type Analysis")
-        sector_type = df.groupby(['Industry Sector', 'Accident Type']).size().reset_index(name='Count')
+    # 1. Industry Sector vs Accident Type
+    st.subheader("Industry Sector and Accident Type Analysis")
+    def build_sector_type():
+        sector_type = aggregations.sector_type(store)
         fig_sector_type = px.sunburst(sector_type, path=['Industry Sector', 'Accident Type'], values='Count',
                                     title='Accident Types Distribution by Industry Sector',
                                     color='Count', color_continuous_scale='RdBu_r')
-        st.plotly_chart(fig_sector_type, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows prevalent accident types in each industry
-        - Helps in industry-specific safety planning
-        - Identifies sector-specific risk patterns
-        """)
-        
-        # 2. Industry vs Accident Severity
-        st.subheader("Industry and Accident Severity Analysis")
-        sector_severity = df.groupby(['Industry Sector', 'Accident Severity']).size().reset_index(name='Count')
+        return fig_sector_type
+    plot_cached('industry/sector_type', store, selections, build_sector_type)
+    st.markdown("""
+    **Insights:**
+    - Shows prevalent accident types in each industry
+    - Helps in industry-specific safety planning
+    - Identifies sector-specific risk patterns
+    """)
+    
+    # 2. Industry vs Accident Severity
+    st.subheader("Industry and Accident Severity Analysis")
+    def build_sector_severity():
+        sector_severity = aggregations.sector_severity(store)
         fig_sector_severity = px.treemap(sector_severity,
                                    path=['Industry Sector', 'Accident Severity'],
                                    values='Count',
                                    title='Accident Severity Distribution by Industry Sector',
                                    color='Count',
                                    color_continuous_scale='RdBu')
-        st.plotly_chart(fig_sector_severity, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows distribution of accident severity in each industry
-        - Helps identify industries with higher rates of severe accidents
-        - Useful for prioritizing safety interventions by industry
-        """)
-        
-        # 3. Industry vs Safety Gear Usage
-        st.subheader("Industry and Safety Gear Usage")
-        sector_gear = df.groupby(['Industry Sector', 'Safety Gear']).size().reset_index(name='Count')
+        return fig_sector_severity
+    plot_cached('industry/sector_severity', store, selections, build_sector_severity)
+    st.markdown("""
+    **Insights:**
+    - Shows distribution of accident severity in each industry
+    - Helps identify industries with higher rates of severe accidents
+    - Useful for prioritizing safety interventions by industry
+    """)
+    
+    # 3. Industry vs Safety Gear Usage
+    st.subheader("Industry and Safety Gear Usage")
+    def build_sector_gear():
+        sector_gear = aggregations.sector_gear(store)
         fig_sector_gear = px.bar(sector_gear, x='Industry Sector', y='Count', color='Safety Gear',
                                title='Safety Gear Usage by Industry Sector',
                                barmode='group')
-        st.plotly_chart(fig_sector_gear, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows safety gear compliance by industry
-        - Identifies industries needing safety gear enforcement
-        - Helps in safety equipment planning
-        """)
+        return fig_sector_gear
+    plot_cached('industry/sector_gear', store, selections, build_sector_gear)
+    st.markdown("""
+    **Insights:**
+    - Shows safety gear compliance by industry
+    - Identifies industries needing safety gear enforcement
+    - Helps in safety equipment planning
+    """)
+
+# Demographic Analysis Tab
+def render_demographic(store, selections):
+    st.header("Demographic Analysis")
+    
+    # Overall Gender Distribution (Pie Chart)
+    st.subheader("Overall Gender Distribution")
+    def build_gender_pie():
+        gender_data = aggregations.gender_share(store)
+        total_employees = len(store)
+        gender_percentages = gender_data['Percentage']
     
-    # Demographic Analysis Tab
-    with tab5:
-        st.header("Demographic Analysis")
-        
-        # Overall Gender Distribution (Pie Chart)
-        st.subheader("Overall Gender Distribution")
-        gender_counts = df['Gender'].value_counts()
-        total_employees = len(df)
-        gender_percentages = (gender_counts / total_employees * 100).round(1)
-        
         fig_gender_pie = px.pie(
-            values=gender_counts,
-            names=gender_counts.index,
+            values=gender_data['Count'],
+            names=gender_data['Gender'],
             title=f'Overall Gender Distribution (Total: {total_employees:,})',
             color_discrete_sequence=['#1f77b4', '#ff7f0e'],  # Blue for Male, Orange for Female
             hover_data=[gender_percentages]
         )
-        
+    
         # Update hover template to show both count and percentage
         fig_gender_pie.update_traces(
             hovertemplate="<b>%{label}</b><br>" +
@@ -911,31 +1282,27 @@ def main():
                          "Percentage: %{customdata:.1f}%<br>" +
                          "<extra></extra>"  # This removes the secondary box
         )
-        
-        st.plotly_chart(fig_gender_pie, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows the overall gender distribution in industrial accidents
-        - Provides baseline context for other gender-based analyses
-        - Helps understand gender representation in workplace incidents
-        """)
+        return fig_gender_pie
+    plot_cached('demographic/gender_pie', store, selections, build_gender_pie)
+    st.markdown("""
+    **Insights:**
+    - Shows the overall gender distribution in industrial accidents
+    - Provides baseline context for other gender-based analyses
+    - Helps understand gender representation in workplace incidents
+    """)
 
-        # 1. Gender Distribution by Accident Severity
-        st.subheader("Gender Distribution by Accident Severity")
-        # Calculate gender distribution by accident severity
-        severity_gender = df.groupby(['Gender', 'Accident Severity']).size().reset_index(name='Count')
-        
-        # Calculate total accidents for each gender
-        total_by_gender = severity_gender.groupby('Gender')['Count'].transform('sum')
-        # Calculate percentage within each gender
-        severity_gender['Percentage'] = (severity_gender['Count'] / total_by_gender * 100).round(1)
-        
+    # 1. Gender Distribution by Accident Severity
+    st.subheader("Gender Distribution by Accident Severity")
+    def build_gender_severity():
+        # Severity distribution for each gender, as a percentage within the gender
+        severity_gender = aggregations.severity_by_gender(store)
+    
         # Add total count information to hover text
         severity_gender['Hover_Text'] = severity_gender.apply(
             lambda x: f"{x['Accident Severity']}<br>"
                      f"Count: {x['Count']}<br>"
                      f"Percentage of {x['Gender']} accidents: {x['Percentage']}%", axis=1)
-        
+    
         fig_gender_severity = px.bar(severity_gender,
                                    x='Gender',
                                    y='Percentage',
@@ -947,7 +1314,7 @@ def main():
                                              'Gender': False,
                                              'Percentage': False,
                                              'Accident Severity': False})
-        
+    
         # Update layout for better readability
         fig_gender_severity.update_layout(
             xaxis_title="Gender",
@@ -957,23 +1324,22 @@ def main():
             yaxis=dict(range=[0, 100])
         )
         fig_gender_severity.update_traces(textposition='inside')
-        st.plotly_chart(fig_gender_severity, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows what percentage of each gender's total accidents falls into each severity category
-        - For example: If 20% of female accidents are fatal, it means 20% of all accidents involving females resulted in fatality
-        - Helps identify if certain genders are more prone to specific severity levels
-        - Useful for targeting safety measures based on gender-specific risk patterns
-        """)
+        return fig_gender_severity
+    plot_cached('demographic/gender_severity', store, selections, build_gender_severity)
+    st.markdown("""
+    **Insights:**
+    - Shows what percentage of each gender's total accidents falls into each severity category
+    - For example: If 20% of female accidents are fatal, it means 20% of all accidents involving females resulted in fatality
+    - Helps identify if certain genders are more prone to specific severity levels
+    - Useful for targeting safety measures based on gender-specific risk patterns
+    """)
 
-        # 2. Gender Distribution by Industry
-        st.subheader("Gender Distribution by Industry")
-        # Calculate gender distribution for each industry
-        industry_gender = df.groupby(['Industry Sector', 'Gender']).size().reset_index(name='Count')
-        # Calculate percentage within each industry
-        total_by_industry = industry_gender.groupby('Industry Sector')['Count'].transform('sum')
-        industry_gender['Percentage'] = (industry_gender['Count'] / total_by_industry * 100).round(1)
-        
+    # 2. Gender Distribution by Industry
+    st.subheader("Gender Distribution by Industry")
+    def build_industry_gender():
+        # Gender distribution for each industry, as a percentage within the industry
+        industry_gender = aggregations.gender_by_industry(store)
+    
         fig_industry_gender = px.bar(industry_gender,
                                    x='Industry Sector',
                                    y='Count',
@@ -982,7 +1348,7 @@ def main():
                                    barmode='group',
                                    text=industry_gender['Percentage'].astype(str) + '%',
                                    color_discrete_sequence=['#1f77b4', '#ff7f0e'])  # Blue for Male, Orange for Female
-        
+    
         # Update layout for better readability
         fig_industry_gender.update_layout(
             xaxis_tickangle=-45,
@@ -991,85 +1357,94 @@ def main():
             showlegend=True
         )
         fig_industry_gender.update_traces(textposition='outside')
-        st.plotly_chart(fig_industry_gender, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows gender distribution across different industry sectors
-        - Helps identify industries with gender imbalances in accidents
-        - Useful for developing industry-specific safety programs considering gender factors
-        """)
-        
-        # 3. Age vs Gender Distribution
-        st.subheader("Age and Gender Distribution")
-        age_gender = df.groupby(['Age Range', 'Gender']).size().reset_index(name='Count')
+        return fig_industry_gender
+    plot_cached('demographic/industry_gender', store, selections, build_industry_gender)
+    st.markdown("""
+    **Insights:**
+    - Shows gender distribution across different industry sectors
+    - Helps identify industries with gender imbalances in accidents
+    - Useful for developing industry-specific safety programs considering gender factors
+    """)
+    
+    # 3. Age vs Gender Distribution
+    st.subheader("Age and Gender Distribution")
+    def build_age_gender():
+        age_gender = aggregations.age_gender(store)
         fig_age_gender = px.bar(age_gender, x='Age Range', y='Count', color='Gender',
                               title='Accident Distribution by Age and Gender',
                               barmode='group')
-        st.plotly_chart(fig_age_gender, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows age and gender patterns in accidents
-        - Identifies vulnerable demographic groups
-        - Helps in targeted safety training
-        """)
-        
-        # 4. Employee Type Analysis
-        st.subheader("Accidents by Employee Type")
-        emp_counts = df['Employee Type'].value_counts()
+        return fig_age_gender
+    plot_cached('demographic/age_gender', store, selections, build_age_gender)
+    st.markdown("""
+    **Insights:**
+    - Shows age and gender patterns in accidents
+    - Identifies vulnerable demographic groups
+    - Helps in targeted safety training
+    """)
+    
+    # 4. Employee Type Analysis
+    st.subheader("Accidents by Employee Type")
+    def build_emp():
+        emp_counts = aggregations.employee_counts(store)
         fig_emp = px.bar(x=emp_counts.index, y=emp_counts.values,
                         labels={'x': 'Employee Type', 'y': 'Number of Accidents'},
                         title='Accident Distribution by Employee Type',
                         color=emp_counts.values,
                         color_continuous_scale='Viridis')
-        st.plotly_chart(fig_emp, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows accident patterns by employee type
-        - Identifies high-risk employee categories
-        - Helps in employee-specific safety planning
-        """)
-        
-        # 5. Age vs Accident Type
-        st.subheader("Age and Accident Type Analysis")
-        age_type = df.groupby(['Age Range', 'Accident Type']).size().reset_index(name='Count')
+        return fig_emp
+    plot_cached('demographic/emp', store, selections, build_emp)
+    st.markdown("""
+    **Insights:**
+    - Shows accident patterns by employee type
+    - Identifies high-risk employee categories
+    - Helps in employee-specific safety planning
+    """)
+    
+    # 5. Age vs Accident Type
+    st.subheader("Age and Accident Type Analysis")
+    def build_age_type():
+        age_type = aggregations.age_type(store)
         fig_age_type = px.bar(age_type, x='Age Range', y='Count', color='Accident Type',
                             title='Accident Types Distribution by Age',
                             barmode='group')
-        st.plotly_chart(fig_age_type, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows prevalent accident types by age group
-        - Helps in age-specific safety training
-        - Identifies age-related risk patterns
-        """)
+        return fig_age_type
+    plot_cached('demographic/age_type', store, selections, build_age_type)
+    st.markdown("""
+    **Insights:**
+    - Shows prevalent accident types by age group
+    - Helps in age-specific safety training
+    - Identifies age-related risk patterns
+    """)
+
+# Risk Analysis Tab
+def render_risk(store, selections):
+    st.header("Risk Analysis")
     
-    # Risk Analysis Tab
-    with tab6:
-        st.header("Risk Analysis")
-        
-        # 1. Accident Type and Causes Analysis
-        st.subheader("Accident Types and Their Causes")
-        accident_causes = df.groupby(['Accident Severity', 'Accident Type']).size().reset_index(name='Count')
+    # 1. Accident Type and Causes Analysis
+    st.subheader("Accident Types and Their Causes")
+    def build_accident_causes():
+        accident_causes = aggregations.severity_type(store)
         fig_accident_causes = px.sunburst(accident_causes,
                                         path=['Accident Severity', 'Accident Type'],
                                         values='Count',
                                         title='Distribution of Accident Types by Severity',
                                         color='Count',
                                         color_continuous_scale='RdBu')
-        st.plotly_chart(fig_accident_causes, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows the distribution of different accident types by severity
-        - Helps identify which types of accidents are most severe
-        - Useful for prioritizing safety measures based on severity
-        """)
-        
-        # 2. Safety Gear Effectiveness Analysis
-        st.subheader("Safety Gear Effectiveness Analysis")
-        safety_analysis = df.groupby(['Safety Gear', 'Accident Severity']).size().reset_index(name='Count')
-        # Calculate percentages within each Accident Severity category
-        safety_analysis['Percentage'] = safety_analysis.groupby('Accident Severity')['Count'].transform(lambda x: x / x.sum() * 100)
-        
+        return fig_accident_causes
+    plot_cached('risk/accident_causes', store, selections, build_accident_causes)
+    st.markdown("""
+    **Insights:**
+    - Shows the distribution of different accident types by severity
+    - Helps identify which types of accidents are most severe
+    - Useful for prioritizing safety measures based on severity
+    """)
+    
+    # 2. Safety Gear Effectiveness Analysis
+    st.subheader("Safety Gear Effectiveness Analysis")
+    def build_safety():
+        # Percentages within each Accident Severity category
+        safety_analysis = aggregations.gear_by_severity(store)
+    
         fig_safety = px.bar(safety_analysis,
                           x='Accident Severity',
                           y='Percentage',
@@ -1078,99 +1453,224 @@ def main():
                           barmode='group',
                           text=safety_analysis['Percentage'].round(1).astype(str) + '%')
         fig_safety.update_traces(textposition='outside')
-        st.plotly_chart(fig_safety, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows the percentage distribution of safety gear usage within each severity level
-        - Helps understand the relationship between safety gear usage and accident severity
-        - Useful for evaluating safety gear effectiveness in different types of accidents
-        """)
-        
-        # 3. Critical Risk vs. Accident Type
-        st.subheader("Critical Risk and Accident Type Analysis")
-        risk_type = df.groupby(['Critical Risk', 'Accident Type']).size().reset_index(name='Count')
+        return fig_safety
+    plot_cached('risk/safety', store, selections, build_safety)
+    st.markdown("""
+    **Insights:**
+    - Shows the percentage distribution of safety gear usage within each severity level
+    - Helps understand the relationship between safety gear usage and accident severity
+    - Useful for evaluating safety gear effectiveness in different types of accidents
+    """)
+    
+    # 3. Critical Risk vs. Accident Type
+    st.subheader("Critical Risk and Accident Type Analysis")
+    def build_risk_type():
+        risk_type = aggregations.risk_type(store)
         fig_risk_type = px.treemap(risk_type,
                                  path=['Critical Risk', 'Accident Type'],
                                  values='Count',
                                  title='Accident Types by Critical Risk',
                                  color='Count',
                                  color_continuous_scale='RdBu')
-        st.plotly_chart(fig_risk_type, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows which critical risks lead to which types of accidents
-        - Helps identify most dangerous risk factors
-        - Useful for targeted risk mitigation
-        """)
-        
-        # 4. Multiple Factor Risk Analysis
-        st.subheader("Multiple Factor Risk Analysis")
-        risk_factors = df.groupby(['Industry Sector', 'Critical Risk', 'Safety Gear']).size().reset_index(name='Count')
+        return fig_risk_type
+    plot_cached('risk/risk_type', store, selections, build_risk_type)
+    st.markdown("""
+    **Insights:**
+    - Shows which critical risks lead to which types of accidents
+    - Helps identify most dangerous risk factors
+    - Useful for targeted risk mitigation
+    """)
+    
+    # 4. Multiple Factor Risk Analysis
+    st.subheader("Multiple Factor Risk Analysis")
+    def build_factors():
+        risk_factors = aggregations.risk_factors(store)
         fig_factors = px.parallel_categories(risk_factors,
                                           dimensions=['Industry Sector', 'Critical Risk', 'Safety Gear'],
                                           color='Count',
                                           title='Multiple Risk Factor Analysis',
                                           color_continuous_scale='RdBu')
-        st.plotly_chart(fig_factors, use_container_width=True)
-        st.markdown("""
-        **Insights:**
-        - Shows complex interactions between multiple risk factors
-        - Helps identify dangerous combinations of factors
-        - Useful for comprehensive risk management
-        """)
+        return fig_factors
+    plot_cached('risk/factors', store, selections, build_factors)
+    st.markdown("""
+    **Insights:**
+    - Shows complex interactions between multiple risk factors
+    - Helps identify dangerous combinations of factors
+    - Useful for comprehensive risk management
+    """)
+
+# Conclusions Tab
+def render_conclusions(store, selections):
+    st.header("Key Findings and Conclusions")
     
-    # Conclusions Tab
-    with tab7:
-        st.header("Key Findings and Conclusions")
-        
-        st.subheader("Temporal Patterns")
-        st.markdown("""
-        - Peak accident periods identified
-        - Shift and day patterns revealed
-        - Seasonal variations in accident frequency
-        - Yearly trends in accident severity
-        """)
-        
-        st.subheader("Geographic Insights")
-        st.markdown("""
-        - High-risk states identified
-        - State-industry combinations with most accidents
-        - Local areas needing safety interventions
-        - Geographic risk scores calculated
-        """)
-        
-        st.subheader("Industry Analysis")
-        st.markdown("""
-        - Industry-specific risk patterns identified
-        - Critical risks in each sector
-        - Safety gear compliance by industry
-        """)
-        
-        st.subheader("Demographic Findings")
-        st.markdown("""
-        - Age and gender patterns in accidents
-        - Employee type specific risks
-        - Demographic risk scores calculated
-        """)
-        
-        st.subheader("Risk Management")
-        st.markdown("""
-        - Critical risk factors identified
-        - Safety gear effectiveness analyzed
-        - Risk mitigation strategies suggested
-        - Comprehensive risk scoring system developed
-        """)
-        
-        st.subheader("Recommendations")
-        st.markdown("""
-        1. Implement targeted safety programs for high-risk industries
-        2. Focus on peak periods and shifts with most accidents
-        3. Enhance safety gear compliance in identified sectors
-        4. Develop age and experience-specific training programs
-        5. Prioritize resources based on risk scores
-        6. Regular safety audits in high-risk areas
-        7. Continuous monitoring of safety measures effectiveness
-        """)
+    st.subheader("Temporal Patterns")
+    st.markdown("""
+    - Peak accident periods identified
+    - Shift and day patterns revealed
+    - Seasonal variations in accident frequency
+    - Yearly trends in accident severity
+    """)
+    
+    st.subheader("Geographic Insights")
+    st.markdown("""
+    - High-risk states identified
+    - State-industry combinations with most accidents
+    - Local areas needing safety interventions
+    - Geographic risk scores calculated
+    """)
+    
+    st.subheader("Industry Analysis")
+    st.markdown("""
+    - Industry-specific risk patterns identified
+    - Critical risks in each sector
+    - Safety gear compliance by industry
+    """)
+    
+    st.subheader("Demographic Findings")
+    st.markdown("""
+    - Age and gender patterns in accidents
+    - Employee type specific risks
+    - Demographic risk scores calculated
+    """)
+    
+    st.subheader("Risk Management")
+    st.markdown("""
+    - Critical risk factors identified
+    - Safety gear effectiveness analyzed
+    - Risk mitigation strategies suggested
+    - Comprehensive risk scoring system developed
+    """)
+    
+    st.subheader("Recommendations")
+    st.markdown("""
+    1. Implement targeted safety programs for high-risk industries
+    2. Focus on peak periods and shifts with most accidents
+    3. Enhance safety gear compliance in identified sectors
+    4. Develop age and experience-specific training programs
+    5. Prioritize resources based on risk scores
+    6. Regular safety audits in high-risk areas
+    7. Continuous monitoring of safety measures effectiveness
+    """)
+
+
+# Dashboard tabs in display order
+TABS = [
+    ("Overview", render_overview),
+    ("Temporal Analysis", render_temporal),
+    ("Geographic Analysis", render_geographic),
+    ("Industry Analysis", render_industry),
+    ("Demographic Analysis", render_demographic),
+    ("Risk Analysis", render_risk),
+    ("Conclusions", render_conclusions),
+]
+
+
+# Main function
+def main():
+    # Spans are only recorded while the timings panel is on or traces are saved
+    trace = None
+    if st.session_state.get('debug_timings') or TRACE_DIR:
+        trace = tracing.start()
+    else:
+        tracing.stop()
+
+    st.title("Industrial Accidents Analysis Dashboard")
+    
+    # Sidebar filters
+    st.sidebar.header("Filters")
+    
+    # A partitioned archive is read after the filters are chosen, so its filter
+    # options come from the catalog; otherwise from the loaded data, including
+    # reports appended since the dashboard started
+    partitioned = os.path.isdir(PARTITIONED_PATH)
+    if partitioned:
+        catalog = load_catalog()
+        labels = catalog.get
+    else:
+        with span('load data', 'load'):
+            store = refresh_data()
+        labels = store.labels
+    
+    # State filter (nothing selected means all states)
+    selected_states = st.sidebar.multiselect('Select State', labels('State'),
+                                             placeholder='All')
+    
+    # Accident Severity filter
+    selected_severities = st.sidebar.multiselect('Select Accident Severity',
+                                                 labels('Accident Severity'),
+                                                 placeholder='All')
+    
+    if partitioned:
+        # Only the matching State/Year partitions (and Severity row groups) are read;
+        # the latest year by default, since the whole archive may not fit in memory
+        first_year, last_year = catalog['Year'][0], catalog['Year'][-1]
+        years = (last_year, last_year)
+        if first_year < last_year:
+            years = st.sidebar.slider("Year range", first_year, last_year, years)
+        rows = count_partitions(tuple(selected_states), tuple(selected_severities), years)
+        if rows > PARTITION_MAX_ROWS:
+            st.info(f"The selected filters match {rows:,} reports, more than the {PARTITION_MAX_ROWS:,} "
+                    "that can be loaded at once. Select fewer years, states or severities.")
+            show_timings(trace)
+            return
+        with span('load partitions', 'load'):
+            store = load_partitions(tuple(selected_states), tuple(selected_severities), years)
+    st.sidebar.caption(f"{store.total_rows:,} reports loaded")
+    approximate = st.sidebar.toggle("Approximate counts", value=store.total_rows >= APPROXIMATE_MIN_ROWS,
+                                    help="Estimate counts the precomputed cube does not cover (e.g. under "
+                                         "More filters) from a stratified sample; charts show their error bound")
+    if approximate:
+        store = store.with_sample(load_sample(store, store.version)) if partitioned else sample_live_data()
+    elif store.sample is not None:
+        # The live store keeps its sample for sessions that estimate
+        store = store.with_sample(None)
+    
+    # Multi-select filters on the remaining categorical columns
+    selections = {'State': selected_states, 'Accident Severity': selected_severities}
+    with st.sidebar.expander("More filters"):
+        for column in MORE_FILTER_COLUMNS:
+            selections[column] = st.multiselect(column, store.labels(column), placeholder='All')
+    
+    # Apply filters: values within a column are OR-ed, columns are AND-ed
+    with span('apply filters', 'filter'):
+        store = aggregations.apply_filters(store, selections)
+        # Chart selections filter every chart but their own (see cross_filter_view)
+        cross = {column: values for column, values in chart_selections().items() if values}
+        _cross_filter_state.set((store, selections, cross))
+        store = aggregations.apply_filters(store, cross)
+        selections = with_chart_selections(selections, cross)
+    if cross:
+        summary = '; '.join(f"{column}: {', '.join(map(str, values))}" for column, values in cross.items())
+        st.info(f"Chart selections: {summary}")
+        st.button("Clear chart selections", on_click=clear_chart_selections)
+    
+    # Filters that exclude each other (e.g. a Local outside the selected State) leave
+    # nothing to chart
+    if len(store) == 0:
+        st.info("No reports match the selected filters.")
+        show_timings(trace)
+        return
+    
+    # Tab mode: build only the open tab (lazy), or every tab up front like st.tabs
+    lazy_tabs = st.sidebar.toggle("Build only the open tab", value=True,
+                                  help="Charts in other tabs are computed when the tab is opened")
+    tab_names = [name for name, _ in TABS]
+    if lazy_tabs:
+        active_tab = st.radio("Tab", tab_names, horizontal=True, key='active_tab',
+                              label_visibility='collapsed')
+        with span(f'tab {active_tab}', 'tab'), concurrent_figures():
+            dict(TABS)[active_tab](store, selections)
+    else:
+        with concurrent_figures():
+            for tab, (name, render_tab) in zip(st.tabs(tab_names), TABS):
+                with tab, span(f'tab {name}', 'tab'):
+                    render_tab(store, selections)
+
+    show_timings(trace)
+
+    # After the first page is out, count the other tabs in the background
+    if not partitioned:
+        start_prewarm()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,79 @@
+import contextvars
+from contextlib import contextmanager
+
+import numpy as np
+
+# z-score of a two-sided 95% confidence interval
+Z_95 = 1.96
+
+# Whether a store with an attached sample may answer scans from it; charts switched
+# to exact counts turn it off while they are built
+_enabled = contextvars.ContextVar('approximate', default=True)
+
+# Estimates made while recording, as (columns, counts, 95% half-widths); None when not recording
+_estimates = contextvars.ContextVar('estimates', default=None)
+
+
+def enabled():
+    return _enabled.get()
+
+
+@contextmanager
+def exact():
+    """Count exactly inside the block, even from stores with a sample attached"""
+    token = _enabled.set(False)
+    try:
+        yield
+    finally:
+        _enabled.reset(token)
+
+
+@contextmanager
+def recording():
+    """Collect the estimates made inside the block; yields the list they are added to"""
+    estimates = []
+    token = _estimates.set(estimates)
+    try:
+        yield estimates
+    finally:
+        _estimates.reset(token)
+
+
+def is_recording():
+    return _estimates.get() is not None
+
+
+def record(columns, counts, half_widths):
+    estimates = _estimates.get()
+    if estimates is not None:
+        estimates.append((columns, counts, half_widths))
+
+
+def chao1(frequencies):
+    """
+    Chao1 estimate of how many distinct values the population holds, from how
+    often each value was drawn in a sample: values seen once or twice hint at
+    how many were never seen. Returns the estimate and its 95% half-width.
+    """
+    frequencies = np.asarray(frequencies)
+    observed = int((frequencies > 0).sum())
+    singletons = int((frequencies == 1).sum())
+    doubletons = int((frequencies == 2).sum())
+    if doubletons:
+        ratio = singletons / doubletons
+        estimate = observed + singletons * ratio / 2
+        variance = doubletons * (ratio ** 4 / 4 + ratio ** 3 + ratio ** 2 / 2)
+    else:
+        # Bias-corrected form, defined without doubletons
+        estimate = observed + singletons * (singletons - 1) / 2
+        variance = (singletons * (singletons - 1) / 2 + singletons * (2 * singletons - 1) ** 2 / 4
+                    - singletons ** 4 / (4 * estimate)) if estimate else 0
+    return estimate, Z_95 * np.sqrt(max(variance, 0))
+
+
+def describe(estimates):
+    """One line on the error of a chart's estimated counts, or None when every count was exact"""
+    largest = max((float(half_widths.max(initial=0)) for _, _, half_widths in estimates), default=0)
+    if largest == 0:
+        return None
+    return f"≈ Estimated from a sample: counts ±{largest:,.0f} or better (95%)"
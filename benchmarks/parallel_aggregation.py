@@ -0,0 +1,103 @@
+"""
+Speedup of process-pool aggregation versus worker count.
+
+Builds a synthetic dictionary-encoded store (default 10M rows, dashboard-like
+cardinalities, skewed values), then times the group-bys a "More filters"
+selection sends past the count cube: once with the in-process scan and once
+per worker count with a ParallelCounter.
+
+    python benchmarks/parallel_aggregation.py --rows 10000000 --workers 1 2 4 8 16 32
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parallel import ParallelCounter  # noqa: E402
+from store import AccidentStore  # noqa: E402
+
+# Column -> number of distinct values, as in the dashboard's data
+CARDINALITIES = {
+    'Year': 6, 'Month': 12, 'DayOfWeek': 7, 'Shift': 3, 'State': 37, 'Local': 555,
+    'Industry Sector': 9, 'Accident Severity': 5, 'Accident Type': 9, 'Gender': 2,
+    'Employee Type': 3, 'Critical Risk': 9, 'Hour Type': 2, 'Safety Gear': 2, 'Age Range': 10
+}
+
+GROUPBYS = [
+    ('State', 'Industry Sector'), ('Local',), ('Industry Sector', 'Critical Risk', 'Safety Gear'),
+    ('Year', 'Month'), ('DayOfWeek', 'Shift'), ('Age Range', 'Accident Type')
+]
+FILTERS = {'Gender': (1,), 'Shift': (0, 2)}
+
+
+def synthetic_store(rows, seed=0):
+    """Store of random codes with Zipf-like skew in every column"""
+    rng = np.random.default_rng(seed)
+    codes, dictionaries = {}, {}
+    for column, cardinality in CARDINALITIES.items():
+        weights = 1.0 / np.arange(1, cardinality + 1)
+        dtype = np.int8 if cardinality <= 127 else np.int16
+        codes[column] = rng.choice(cardinality, size=rows, p=weights / weights.sum()).astype(dtype)
+        dictionaries[column] = pd.Index([f'{column} {i}' for i in range(cardinality)])
+    return AccidentStore(codes, dictionaries, {})
+
+
+def query(store):
+    """Filter and count, as one dashboard rerun would (fresh view, nothing cached)"""
+    for column, selected in FILTERS.items():
+        store = store.isin(column, [store.dictionaries[column][code] for code in selected])
+    return store.count_many(GROUPBYS)
+
+
+def timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[w for w in (1, 2, 4, 8, 16, 32) if w <= (os.cpu_count() or 1)])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    store = synthetic_store(args.rows)
+    serial = timed(lambda: query(store), args.repeat)
+    results = [{'workers': 0, 'seconds': serial, 'speedup': 1.0}]
+    print(f"{args.rows:,} rows, {len(GROUPBYS)} group-bys, filters {FILTERS}")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    print(f"{'serial':>8} {serial:9.3f} {1.0:8.2f}")
+
+    expected = query(store)
+    for workers in args.workers:
+        counter = ParallelCounter(store.codes, workers, min_rows=0)
+        try:
+            parallel_store = store.with_counter(counter)
+            # First call starts the workers; check it against the serial counts
+            counts = query(parallel_store)
+            assert all(np.array_equal(counts[key], expected[key]) for key in GROUPBYS)
+            seconds = timed(lambda: query(parallel_store), args.repeat)
+        finally:
+            counter.close()
+        results.append({'workers': workers, 'seconds': seconds, 'speedup': serial / seconds})
+        print(f"{workers:>8} {seconds:9.3f} {serial / seconds:8.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rows': args.rows, 'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
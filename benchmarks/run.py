@@ -0,0 +1,183 @@
+"""
+Benchmark suite: times each stage of the dashboard on synthetic data.
+
+For every size, a synthetic CSV is generated (see synthetic.py) and these
+stages are timed separately (best of --repeat):
+
+- load/convert_csv, load/read_dataset, load/build_store: what load_data does
+- tab/<tab>[<filters>]: the tab's aggregations (aggregations.py) with no
+  filters, one State, and "More filters" columns the count cube does not cover
+- choropleth: create_choropleth_map
+- serialize/<chart>: Plotly figure to JSON, as sent to the browser
+
+Results go to a JSON file; --compare prints the ratio between two of them:
+
+    python benchmarks/run.py --rows 10000 100000 1000000 --output results.json
+    python benchmarks/run.py --compare baseline.json results.json
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly.express as px  # noqa: E402
+
+import aggregations  # noqa: E402
+import ingest  # noqa: E402
+import synthetic  # noqa: E402
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+# Filter sets each tab is timed under
+FILTER_SETS = {
+    'all': {},
+    'state': {'State': ['Maharashtra']},
+    'more_filters': {'Industry Sector': ['Steel', 'Mining'], 'Shift': ['Night']},
+}
+
+# A stage is reported as a regression when it slows down by more than this
+REGRESSION_RATIO = 1.2
+
+
+def timed(function, repeat):
+    """Best wall time of `repeat` calls, and the last call's result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def tab_aggregates(tab):
+    """The aggregations a dashboard tab computes"""
+    if tab == 'overview':
+        return [aggregations.overview_counts,
+                lambda store: aggregations.age_counts(store)]
+    return [aggregate for name, aggregate in aggregations.AGGREGATES.items()
+            if name.split('/')[0] == tab]
+
+
+def benchmark_size(rows, workdir, repeat, record):
+    csv_path = os.path.join(workdir, f'synthetic_{rows}.csv')
+    dataset_path = os.path.join(workdir, f'synthetic_{rows}.feather')
+    seconds, _ = timed(lambda: synthetic.write_csv(csv_path, rows), 1)
+    record(rows, 'generate', seconds)
+
+    seconds, _ = timed(lambda: ingest.convert_csv(csv_path, dataset_path), repeat)
+    record(rows, 'load/convert_csv', seconds)
+    seconds, df = timed(lambda: ingest.read_dataset(dataset_path, ingest.DASHBOARD_COLUMNS), repeat)
+    record(rows, 'load/read_dataset', seconds)
+    # Bound to this frame, so deleting the name below leaves the timed call intact
+    seconds, store = timed(functools.partial(aggregations.build_store, df), repeat)
+    record(rows, 'load/build_store', seconds)
+    del df
+
+    for tab in ['overview', 'temporal', 'geographic', 'industry', 'demographic', 'risk']:
+        for filter_name, selections in FILTER_SETS.items():
+            # A fresh filtered view each time, as each dashboard rerun builds one
+            def run_tab():
+                filtered = aggregations.apply_filters(store, selections)
+                return [aggregate(filtered) for aggregate in tab_aggregates(tab)]
+            seconds, _ = timed(run_tab, repeat)
+            record(rows, f'tab/{tab}[{filter_name}]', seconds)
+
+    # The app module draws the charts; outside `streamlit run` it only logs warnings
+    os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+    import app
+
+    seconds, (choropleth, _) = timed(lambda: app.create_choropleth_map(store), repeat)
+    record(rows, 'choropleth', seconds)
+    figures = {
+        'choropleth': choropleth,
+        'state_sector': px.treemap(aggregations.state_sector(store), path=['State', 'Industry Sector'],
+                                   values='Count', color='Count'),
+        'age_type': px.bar(aggregations.age_type(store), x='Age Range', y='Count',
+                           color='Accident Type', barmode='group'),
+        'year_month': px.imshow(aggregations.year_month(store)),
+    }
+    for name, figure in figures.items():
+        seconds, figure_json = timed(figure.to_json, repeat)
+        record(rows, f'serialize/{name}', seconds, bytes=len(figure_json))
+
+    os.remove(csv_path)
+    os.remove(dataset_path)
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(baseline_path, current_path):
+    """Print each stage's time in both result files and flag regressions"""
+    def load(path):
+        with open(path) as f:
+            return {(r['rows'], r['stage']): r['seconds'] for r in json.load(f)['results']}
+    baseline, current = load(baseline_path), load(current_path)
+    regressions = 0
+    print(f"{'rows':>11} {'stage':<36} {'baseline':>9} {'current':>9} {'ratio':>6}")
+    for key in sorted(baseline.keys() & current.keys()):
+        ratio = current[key] / baseline[key] if baseline[key] else float('inf')
+        flag = '  slower' if ratio > REGRESSION_RATIO else ''
+        regressions += ratio > REGRESSION_RATIO
+        print(f"{key[0]:>11,} {key[1]:<36} {baseline[key]:9.4f} {current[key]:9.4f} {ratio:6.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS,
+                        help='dataset sizes, e.g. 10000 ... 100000000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--workdir', help='where synthetic files are written (default: a temp folder)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'))
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    results = []
+
+    def record(rows, stage, seconds, **extra):
+        results.append(dict(rows=rows, stage=stage, seconds=seconds, **extra))
+        print(f"{rows:>11,} {stage:<36} {seconds:9.4f}s", flush=True)
+
+    # Paths in the app (boundary files, caches) are relative to the repository
+    output = os.path.abspath(args.output)
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for rows in args.rows:
+            benchmark_size(rows, workdir, args.repeat, record)
+            # Written after every size so a long run keeps what it measured
+            with open(output, 'w') as f:
+                json.dump({'meta': metadata(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
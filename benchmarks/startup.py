@@ -0,0 +1,83 @@
+"""
+Startup time of a fresh dashboard process, checked against a budget.
+
+Each measurement runs in a new interpreter, as a new server worker would:
+
+- import: importing the app module (no data loaded), and whether Plotly
+  Express was imported with it
+- first_render/cold: the first page with an empty cache folder
+- first_render/warm: the first page of a second process on the same cache
+  folder, as after a restart or `python aggregations.py --warm`
+
+    python benchmarks/startup.py --budget 3 --output startup.json
+
+The exit status is 1 when the warm first render exceeds --budget seconds.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = '''
+import json, os, sys, time
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+sys.path.insert(0, os.getcwd())
+start = time.perf_counter()
+import app
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'plotly_express': 'plotly.express' in sys.modules}))
+'''
+
+RENDER_SCRIPT = '''
+import json, os, sys, time
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(os.path.join(os.getcwd(), 'app.py'), default_timeout=600).run()
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'ok': not at.exception}))
+'''
+
+
+def measure(script, cache_dir):
+    """Run `script` in a fresh interpreter in the repository; returns its JSON line"""
+    env = dict(os.environ, CACHE_DIR=cache_dir, PYTHONPATH=ROOT, PYTHONWARNINGS='ignore')
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--budget', type=float, default=3.0,
+                        help='seconds allowed for the warm first render')
+    parser.add_argument('--output', help='also write the report to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        report = {
+            'import': measure(IMPORT_SCRIPT, cache_dir),
+            'first_render/cold': measure(RENDER_SCRIPT, cache_dir),
+            'first_render/warm': measure(RENDER_SCRIPT, cache_dir),
+            'budget': args.budget,
+        }
+    for stage in ['import', 'first_render/cold', 'first_render/warm']:
+        print(f"{stage:<20} {report[stage]['seconds']:7.2f}s")
+    if report['import']['plotly_express']:
+        print("plotly.express was imported with the app module")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    warm = report['first_render/warm']
+    if not warm['ok'] or warm['seconds'] > args.budget:
+        print(f"Warm first render over the {args.budget:g}s budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Synthetic accident data with the same 18 columns as Indian_Industrial_Accidents.csv.
+
+Cardinalities follow the real data, scaled up to a national archive: 37
+states and union territories, 15 local areas each (555 in all), skewed
+(Zipf-like) frequencies for states, sectors and risks, and the observed
+severity mix. Rows are generated and written in chunks, so 10^8 rows need
+no more memory than one chunk:
+
+    python benchmarks/synthetic.py 1000000 synthetic_1M.csv
+"""
+import argparse
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+STATES = [
+    'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh', 'Goa', 'Gujarat',
+    'Haryana', 'Himachal Pradesh', 'Jharkhand', 'Karnataka', 'Kerala', 'Madhya Pradesh',
+    'Maharashtra', 'Manipur', 'Meghalaya', 'Mizoram', 'Nagaland', 'Odisha', 'Punjab',
+    'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura', 'Uttar Pradesh', 'Uttarakhand',
+    'West Bengal', 'Andaman and Nicobar Islands', 'Chandigarh', 'Dadra and Nagar Haveli',
+    'Daman and Diu', 'Delhi', 'Jammu and Kashmir', 'Ladakh', 'Lakshadweep', 'Puducherry'
+]
+LOCALS_PER_STATE = 15
+
+# Column -> (labels, weights); None weights means Zipf-like skew in label order
+CATEGORIES = {
+    'DayOfWeek': (['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+                  [15, 15, 15, 15, 15, 13, 12]),
+    'Shift': (['Morning', 'Afternoon', 'Night'], [40, 35, 25]),
+    'Country': (['India'], [1]),
+    'State': (STATES, None),
+    'Industry Sector': (['Construction', 'Mining', 'Steel', 'Cement', 'Petrochemicals', 'Textiles',
+                         'Automobiles', 'Fertilizers', 'Pharmaceuticals', 'Electronics'], None),
+    'Accident Severity': (['Severe Injury', 'Minor Injury', 'Handicapped', 'Fatal'],
+                          [2269, 2012, 1194, 1025]),
+    'Potential Severity': (['High', 'Moderate', 'Low'], [35, 40, 25]),
+    'Accident Type': (['Machinery Accident', 'Fall from Height', 'Slips/Trips', 'Manual Handling',
+                       'Electrical Fault', 'Fire', 'Chemical Spill', 'Vehicle Collision',
+                       'Explosion', 'Structural Collapse'], None),
+    'Gender': (['Male', 'Female'], [80, 20]),
+    'Employee Type': (['Employee', 'Third Party', 'Outsider'], [55, 30, 15]),
+    'Critical Risk': (['Heavy Machinery', 'Slip/Trip', 'Fall from Height', 'Manual Tools',
+                       'Electric Shock', 'Mechanical Impact', 'Fire/Explosion', 'Chemical Exposure',
+                       'Pressure Systems', 'Gas Leak'], None),
+    'Hour Type': (['Working Hours', 'Overtime'], [75, 25]),
+    'Safety Gear': (['Yes', 'No'], [60, 40]),
+    'Month': (['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+               'September', 'October', 'November', 'December'], [1] * 12),
+}
+
+# Column order of the real CSV
+COLUMNS = [
+    'Year', 'DayOfWeek', 'Shift', 'Country', 'State', 'Local', 'Industry Sector',
+    'Accident Severity', 'Potential Severity', 'Accident Type', 'Gender', 'Age',
+    'Employee Type', 'Critical Risk', 'Damage Index', 'Hour Type', 'Safety Gear', 'Month'
+]
+
+CHUNK_ROWS = 1_000_000
+
+
+def _probabilities(labels, weights, skew=0.8):
+    if weights is None:
+        weights = 1.0 / np.arange(1, len(labels) + 1) ** skew
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+def generate_chunk(rows, rng, years=(2015, 2024)):
+    """One pa.Table of `rows` synthetic accidents"""
+    columns = {}
+    codes = {}
+    for name, (labels, weights) in CATEGORIES.items():
+        codes[name] = rng.choice(len(labels), size=rows, p=_probabilities(labels, weights))
+        columns[name] = pc.take(pa.array(labels), pa.array(codes[name]))
+
+    # Local areas belong to their state; a few areas in each state see most accidents
+    local_rank = rng.choice(LOCALS_PER_STATE, size=rows,
+                            p=_probabilities(range(LOCALS_PER_STATE), None, skew=1.0))
+    local_labels = pa.array([f'{state}_Local_{i + 1}' for state in STATES
+                             for i in range(LOCALS_PER_STATE)])
+    columns['Local'] = pc.take(local_labels, pa.array(codes['State'] * LOCALS_PER_STATE + local_rank))
+
+    columns['Year'] = pa.array(rng.integers(years[0], years[1] + 1, size=rows))
+    columns['Age'] = pa.array(np.clip(rng.normal(40, 10, size=rows), 18, 65).astype(np.int64))
+    columns['Damage Index'] = pa.array(
+        np.clip(rng.lognormal(7, 1.2, size=rows), 2, 10000).astype(np.int64))
+    return pa.table([columns[name] for name in COLUMNS], names=COLUMNS)
+
+
+def write_csv(path, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Write `rows` synthetic accidents to a CSV at `path`, one chunk at a time"""
+    rng = np.random.default_rng(seed)
+    writer = None
+    try:
+        for start in range(0, rows, chunk_rows):
+            table = generate_chunk(min(chunk_rows, rows - start), rng)
+            if writer is None:
+                writer = pa_csv.CSVWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(f"Wrote {write_csv(args.path, args.rows, args.seed)}")
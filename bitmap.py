@@ -0,0 +1,173 @@
+import numpy as np
+
+from store import GrowableArray
+
+# Number of set bits in every byte value, for counting packed bitmaps
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+# A value's rows are kept as a position list when that is smaller than a bitset
+# (4 bytes per row against size / 8 bytes)
+_SPARSE_RATIO = 32
+
+
+class Bitmap:
+    """
+    A set of row positions, stored either as a packed bitset (dense) or as a
+    sorted uint32 position array (sparse), whichever is smaller.
+
+    Sparse storage keeps high-cardinality columns such as Local from costing
+    size / 8 bytes per value. AND/OR always produce a dense result. Bits past
+    `size` in the last byte are padding and may be set (see extend).
+    """
+
+    __slots__ = ('size', 'bits', 'positions', 'buffer')
+
+    def __init__(self, size, bits=None, positions=None, buffer=None):
+        self.size = size
+        self.bits = bits
+        self.positions = positions
+        self.buffer = buffer  # GrowableArray the bits or positions are a view of, after extend
+
+    @classmethod
+    def from_positions(cls, positions, size):
+        if len(positions) * _SPARSE_RATIO < size:
+            return cls(size, positions=np.asarray(positions, dtype=np.uint32))
+        mask = np.zeros(size, dtype=bool)
+        mask[positions] = True
+        return cls(size, bits=np.packbits(mask))
+
+    @classmethod
+    def empty(cls, size):
+        return cls(size, positions=np.empty(0, dtype=np.uint32))
+
+    def dense(self):
+        """Packed bits, expanding a sparse bitmap if needed"""
+        if self.bits is not None:
+            return self.bits
+        bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        positions = self.positions.astype(np.int64)
+        np.bitwise_or.at(bits, positions >> 3, (128 >> (positions & 7)).astype(np.uint8))
+        return bits
+
+    def extend(self, size, positions):
+        """
+        This set grown to `size` rows, with `positions` (all past the old size)
+        added. The bits or positions grow in a GrowableArray, so the cost is
+        proportional to the new rows; growing in place may set padding bits of
+        this set's last byte, which nothing reads.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if self.bits is None:
+            total = len(self.positions) + len(positions)
+            if total * _SPARSE_RATIO >= size:
+                return Bitmap.from_positions(np.concatenate([self.positions, positions]), size)
+            buffer = self._growable(self.positions, total)
+            buffer = buffer.extend(len(self.positions), total)
+            buffer.rows(len(self.positions), total)[:] = positions
+            return Bitmap(size, positions=buffer.view(total), buffer=buffer)
+        length = (size + 7) // 8
+        buffer = self._growable(self.bits, length).extend(len(self.bits), length)
+        # The first new row may share the old last byte, so bytes are set from there on,
+        # after clearing its padding (set if another extension of this set grew in place)
+        start = max(len(self.bits) - 1, 0)
+        rows = buffer.rows(start, length)
+        if self.size % 8:
+            rows[0] &= (0xFF << (8 - self.size % 8)) & 0xFF
+        offsets = positions - start * 8
+        np.bitwise_or.at(rows, offsets >> 3, (128 >> (offsets & 7)).astype(np.uint8))
+        return Bitmap(size, bits=buffer.view(length), buffer=buffer)
+
+    def _growable(self, array, length):
+        if self.buffer is not None and self.buffer.holds(array):
+            return self.buffer
+        return GrowableArray(array, 2 * length)
+
+    def __or__(self, other):
+        return Bitmap(self.size, bits=self.dense() | other.dense())
+
+    def __and__(self, other):
+        return Bitmap(self.size, bits=self.dense() & other.dense())
+
+    def __len__(self):
+        if self.bits is None:
+            return len(self.positions)
+        if not len(self.bits):
+            return 0
+        # Padding bits of the last byte are masked off
+        last = self.bits[-1] & (0xFF << (-self.size % 8)) & 0xFF
+        return int(_POPCOUNT[self.bits[:-1]].sum(dtype=np.int64)) + int(_POPCOUNT[last])
+
+    def to_rows(self):
+        """Selected row positions in ascending order"""
+        if self.bits is None:
+            return self.positions.astype(np.int64)
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.size))
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes if self.bits is not None else self.positions.nbytes
+
+
+class BitmapIndex:
+    """One Bitmap per (column, code), built once so filters never rescan the codes"""
+
+    def __init__(self, bitmaps, size):
+        self.bitmaps = bitmaps  # column -> list of Bitmap indexed by code
+        self.size = size
+
+    @classmethod
+    def build(cls, codes):
+        """Index every code column; a stable sort groups each value's rows together"""
+        bitmaps = {}
+        size = 0
+        for column, column_codes in codes.items():
+            size = len(column_codes)
+            order = np.argsort(column_codes, kind='stable')
+            counts = np.bincount(column_codes, minlength=column_codes.max(initial=-1) + 1)
+            bounds = np.concatenate([[0], np.cumsum(counts)])
+            bitmaps[column] = [
+                Bitmap.from_positions(order[start:end], size)
+                for start, end in zip(bounds[:-1], bounds[1:])
+            ]
+        return cls(bitmaps, size)
+
+    def append(self, codes):
+        """Index with rows holding `codes` (column -> new code array) added after the existing rows"""
+        bitmaps = {}
+        size = self.size
+        for column, column_codes in codes.items():
+            size = self.size + len(column_codes)
+            existing = self.bitmaps[column]
+            order = np.argsort(column_codes, kind='stable') + self.size
+            counts = np.bincount(column_codes, minlength=len(existing))
+            bounds = np.concatenate([[0], np.cumsum(counts)])
+            # Codes first seen in the new rows start from an empty set
+            existing = existing + [Bitmap.empty(self.size)] * (len(counts) - len(existing))
+            bitmaps[column] = [
+                bitmap.extend(size, order[start:end])
+                for bitmap, start, end in zip(existing, bounds[:-1], bounds[1:])
+            ]
+        return BitmapIndex(bitmaps, size)
+
+    def covers(self, filters):
+        return all(column in self.bitmaps for column in filters)
+
+    def select(self, filters):
+        """AND across columns of the OR of each column's selected codes"""
+        result = None
+        for column, selected in filters.items():
+            column_bitmaps = self.bitmaps[column]
+            chosen = [column_bitmaps[code] for code in selected if 0 <= code < len(column_bitmaps)]
+            if len(chosen) == 1:
+                # A single value keeps its own (possibly sparse) bitmap
+                matched = chosen[0]
+            else:
+                matched = Bitmap.empty(self.size)
+                for bitmap in chosen:
+                    matched = matched | bitmap
+            result = matched if result is None else result & matched
+        return result
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for column in self.bitmaps.values() for b in column)
@@ -0,0 +1,315 @@
+import hashlib
+import heapq
+import os
+import queue
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Counts quicker than this to compute are not saved to disk, since loading a
+# file back takes about as long
+DISK_MIN_SECONDS = 0.01
+
+# Default size limit of the saved counts; the least recently used files are deleted past it
+DISK_MAX_BYTES = 256 << 20
+
+# Counts waiting to be saved; past this many, new ones are dropped rather than queued
+DISK_QUEUE_SIZE = 256
+
+
+def filter_key(selections):
+    """Normalize sidebar selections into a hashable key (order and empty filters ignored)"""
+    return tuple(sorted(
+        (column, tuple(sorted(map(str, values))))
+        for column, values in selections.items() if values
+    ))
+
+
+class FigureCache:
+    """
+    LRU cache of serialized Plotly figures, bounded by their total size in bytes.
+
+    Entries are figure JSON strings keyed by (chart id, filter key). One cache
+    is shared by every session in the process, so access is locked.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached figure JSON for `key`, or None, marking it most recently used"""
+        with self._lock:
+            figure_json = self._entries.get(key)
+            if figure_json is not None:
+                self._entries.move_to_end(key)
+            return figure_json
+
+    def put(self, key, figure_json):
+        """Store `figure_json`, evicting least recently used entries to stay within budget"""
+        size = sys.getsizeof(figure_json)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= sys.getsizeof(self._entries.pop(key))
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+            self._entries[key] = figure_json
+            self._bytes += size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+
+class AggregateCache:
+    """
+    Count arrays shared by every session, keyed by (dataset version, group-by
+    columns, filter predicate), within a budget in bytes.
+
+    Eviction is cost-aware (GreedyDual-Size): an entry's priority is the time
+    it took to compute per byte it holds, plus an inflation value that rises
+    with every eviction, so cheap or large results go first while anything
+    recently used stays ahead of entries not touched since.
+
+    With a `directory`, counts of stores whose version is a content hash and
+    that took at least `min_disk_seconds` to compute are also saved there, one
+    file per entry under a folder per version, so a restarted process finds
+    them on disk instead of recomputing them. Files are written by a
+    background thread, off the caller's request, and the least recently used
+    are deleted once they add up to more than `max_disk_bytes`.
+    """
+
+    def __init__(self, max_bytes, directory=None, max_disk_bytes=DISK_MAX_BYTES,
+                 min_disk_seconds=DISK_MIN_SECONDS):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.min_disk_seconds = min_disk_seconds
+        self._entries = {}   # key -> (counts, nbytes, priority, seconds to compute)
+        self._heap = []      # (priority, sequence, key); stale when the priority no longer matches
+        self._sequence = 0
+        self._inflation = 0.0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_writes = 0
+        self._writes = queue.Queue(DISK_QUEUE_SIZE)  # (path, counts, seconds) to save
+        self._writing = set()    # paths queued or being written
+        self._writer = None
+        self._disk_bytes = None  # size of the saved files, counted on the first write
+
+    def _prioritize(self, key, nbytes, seconds):
+        priority = self._inflation + seconds / max(nbytes, 1)
+        self._sequence += 1
+        heapq.heappush(self._heap, (priority, self._sequence, key))
+        return priority
+
+    def _disk_path(self, key):
+        # Only content-hash versions name the same rows in another process
+        if self.directory is None or not isinstance(key[0], str):
+            return None
+        name = hashlib.sha1(repr(key[1:]).encode()).hexdigest()
+        return os.path.join(self.directory, key[0], name + '.npz')
+
+    def get(self, key):
+        """Return the cached counts for `key`, from memory or disk, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                counts, nbytes, seconds = entry[0], entry[1], entry[3]
+                self._entries[key] = (counts, nbytes, self._prioritize(key, nbytes, seconds), seconds)
+                return counts
+        path = self._disk_path(key)
+        if path is not None and os.path.exists(path):
+            try:
+                with np.load(path) as saved:
+                    counts, seconds = saved['counts'], float(saved['seconds'])
+            except (OSError, ValueError, KeyError):
+                pass
+            else:
+                # Marks the file recently used, so it is deleted last
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                self._put(key, counts, seconds)
+                return counts
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, counts, seconds):
+        """Store `counts` (made read-only), which took `seconds` to compute"""
+        self._put(key, counts, seconds)
+        path = self._disk_path(key)
+        if path is None or seconds < self.min_disk_seconds:
+            return
+        with self._lock:
+            if path in self._writing or os.path.exists(path):
+                return
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='aggregate-cache-writer',
+                                                daemon=True)
+                self._writer.start()
+            try:
+                self._writes.put_nowait((path, counts, seconds))
+            except queue.Full:
+                return
+            self._writing.add(path)
+
+    def flush(self):
+        """Wait until every queued count is saved to disk"""
+        self._writes.join()
+
+    def _write_loop(self):
+        while True:
+            path, counts, seconds = self._writes.get()
+            try:
+                self._write(path, counts, seconds)
+            except OSError:
+                pass
+            finally:
+                with self._lock:
+                    self._writing.discard(path)
+                self._writes.task_done()
+
+    def _write(self, path, counts, seconds):
+        # Written under a temporary name, so other processes never read a partial file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez(f, counts=counts, seconds=seconds)
+        os.replace(temporary, path)
+        self.disk_writes += 1
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _, size, _ in self._saved_files())
+        else:
+            self._disk_bytes += os.path.getsize(path)
+        if self._disk_bytes > self.max_disk_bytes:
+            self._trim_disk()
+
+    def _saved_files(self):
+        """(last used, size, path) of every saved count file"""
+        files = []
+        for folder, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.npz'):
+                    path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _trim_disk(self):
+        # Down to three quarters of the limit, so the folder is not listed on every write
+        files = sorted(self._saved_files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_disk_bytes * 3 // 4:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._disk_bytes = total
+
+    def prune_disk(self, keep):
+        """
+        Delete saved counts of every version next to those in `keep`, e.g. after
+        the data changed. A version like 'source/content' only prunes the
+        other contents of its source, so sources can share the directory.
+        """
+        if self.directory is None:
+            return
+        folders = {}
+        for kept in keep:
+            path = os.path.join(self.directory, kept)
+            folders.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+        for folder, names in folders.items():
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                if name not in names and os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+        self._disk_bytes = None
+
+    def _put(self, key, counts, seconds):
+        nbytes = counts.nbytes
+        if nbytes > self.max_bytes:
+            return
+        counts.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            while self._entries and self._bytes + nbytes > self.max_bytes:
+                priority, _, evicted = heapq.heappop(self._heap)
+                entry = self._entries.get(evicted)
+                if entry is None or entry[2] != priority:
+                    continue
+                del self._entries[evicted]
+                self._bytes -= entry[1]
+                self._inflation = priority
+                self.evictions += 1
+            self._entries[key] = (counts, nbytes, self._prioritize(key, nbytes, seconds), seconds)
+            self._bytes += nbytes
+            # Drop stale heap entries once they outnumber live ones
+            if len(self._heap) > 4 * len(self._entries) + 64:
+                live = {key: entry[2] for key, entry in self._entries.items()}
+                self._heap = [item for item in self._heap if live.get(item[2]) == item[0]]
+                heapq.heapify(self._heap)
+
+    def stats(self):
+        """Hit rate, entries, bytes held and eviction count, for sizing the budget"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'disk_writes': self.disk_writes,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._heap = []
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
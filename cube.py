@@ -0,0 +1,80 @@
+import numpy as np
+
+# Columns the sidebar filters on; every cuboid keeps them as axes so any
+# filter combination can be answered by slicing
+FILTER_COLUMNS = ('State', 'Accident Severity')
+
+
+class CountCube:
+    """
+    Materialized accident counts for a set of group-bys (cuboids).
+
+    Each cuboid is a dense count array with one axis per column, built once from
+    the full store. A query for some columns under some filters is answered from
+    the smallest cuboid that covers them: filtered axes are masked down to the
+    selected codes and every other axis the query does not ask for is summed out.
+    """
+
+    def __init__(self, cuboids, filter_columns=FILTER_COLUMNS):
+        self.cuboids = cuboids              # tuple of columns -> count array
+        self.filter_columns = filter_columns
+
+    @classmethod
+    def build(cls, store, groupings, filter_columns=FILTER_COLUMNS):
+        """Count every grouping (plus the filter columns), all in one blocked pass over the rows"""
+        axes_list = []
+        for grouping in groupings:
+            axes = tuple(filter_columns) + tuple(c for c in grouping if c not in filter_columns)
+            axes_list.append(axes)
+
+        # Skip cuboids that a larger one already covers
+        kept = []
+        for axes in sorted(set(axes_list), key=len, reverse=True):
+            if not any(set(axes) <= set(built) for built in kept):
+                kept.append(axes)
+        counts = store.count_many(kept)
+        return cls({axes: counts[axes] for axes in kept}, tuple(filter_columns))
+
+    def covers(self, columns, filters):
+        needed = set(columns) | set(filters)
+        return any(needed <= set(axes) for axes in self.cuboids)
+
+    def count_array(self, columns, filters):
+        """
+        Counts for `columns` (axes in that order) restricted by `filters`
+        (column -> tuple of selected codes), or None if no cuboid covers the query.
+        """
+        needed = set(columns) | set(filters)
+        candidates = [axes for axes in self.cuboids if needed <= set(axes)]
+        if not candidates:
+            return None
+        axes = min(candidates, key=lambda a: self.cuboids[a].size)
+        counts = self.cuboids[axes]
+
+        for position, axis in enumerate(axes):
+            if axis not in filters:
+                continue
+            keep = np.zeros(counts.shape[position], dtype=counts.dtype)
+            keep[list(filters[axis])] = 1
+            shape = [1] * counts.ndim
+            shape[position] = -1
+            counts = counts * keep.reshape(shape)
+
+        summed = tuple(position for position, axis in enumerate(axes) if axis not in columns)
+        counts = counts.sum(axis=summed)
+        remaining = [axis for axis in axes if axis in columns]
+        return counts.transpose([remaining.index(column) for column in columns])
+
+    def append(self, delta):
+        """
+        Cube with the rows of `delta` (a store over only the new rows, sharing
+        the grown dictionaries) added: one pass counts the new rows for every
+        cuboid, and existing counts are padded for labels first seen in them.
+        """
+        added = delta.count_many(list(self.cuboids))
+        cuboids = {}
+        for axes, counts in self.cuboids.items():
+            new_counts = added[axes]
+            padding = [(0, new - old) for old, new in zip(counts.shape, new_counts.shape)]
+            cuboids[axes] = np.pad(counts, padding) + new_counts
+        return CountCube(cuboids, self.filter_columns)
@@ -0,0 +1,272 @@
+import json
+import os
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Known alternative spellings, keyed by the name the dataset uses
+STATE_ALIASES = {
+    "Delhi": ["NCT of Delhi", "National Capital Territory of Delhi"],
+    "Jammu and Kashmir": ["Jammu & Kashmir", "J&K"],
+    "Andaman and Nicobar Islands": ["A & N Islands", "Andaman & Nicobar", "Andaman & Nicobar Islands"],
+    "Dadra and Nagar Haveli": ["Dadra & Nagar Haveli", "DNH"],
+    "Daman and Diu": ["Daman & Diu"],
+    "Tamil Nadu": ["Tamilnadu"],
+    "Puducherry": ["Pondicherry"],
+    "Odisha": ["Orissa"],
+    "Uttarakhand": ["Uttaranchal"],
+    "Telangana": ["Telengana"]
+}
+
+
+def normalize_state_name(name):
+    """Case-, punctuation- and '&'-insensitive form of a state name"""
+    text = str(name).lower().replace('&', ' and ')
+    text = re.sub(r'[^a-z0-9]+', ' ', text)
+    return ' '.join(text.split())
+
+
+class StateNameIndex:
+    """
+    Resolves any spelling of a state name to one canonical join key.
+
+    Aliases are normalized once when the index is built; names that are not
+    aliases fall back to their own normalized form, so case and punctuation
+    differences still match.
+    """
+
+    def __init__(self, aliases=STATE_ALIASES):
+        self._keys = {}
+        for canonical, variants in aliases.items():
+            for name in [canonical] + list(variants):
+                self._keys[normalize_state_name(name)] = normalize_state_name(canonical)
+
+    def key(self, name):
+        normalized = normalize_state_name(name)
+        return self._keys.get(normalized, normalized)
+
+    def keys(self, names):
+        """Join keys for a column of names, resolving each distinct name once"""
+        names = pd.Series(names)
+        lookup = {name: self.key(name) for name in names.unique()}
+        return names.map(lookup).to_numpy()
+
+
+# Built once per process and shared by every map
+STATE_NAME_INDEX = StateNameIndex()
+
+
+# Simplification levels for map payloads: Douglas-Peucker tolerance and
+# coordinate precision, both in degrees
+DETAIL_LEVELS = {
+    'coarse': {'tolerance': 0.05, 'decimals': 2},
+    'medium': {'tolerance': 0.01, 'decimals': 3},
+    'fine': {'tolerance': 0.002, 'decimals': 4}
+}
+
+
+def level_for_zoom(zoom):
+    """Detail level whose precision matches a mapbox zoom"""
+    if zoom < 5:
+        return 'coarse'
+    if zoom < 7:
+        return 'medium'
+    return 'fine'
+
+
+def _douglas_peucker(points, tolerance):
+    """Keep-mask for the vertices of a polyline under Douglas-Peucker"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        inner = points[start + 1:end]
+        origin, direction = points[start], points[end] - points[start]
+        length = np.hypot(direction[0], direction[1])
+        offsets = inner - origin
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def _simplify_segment(segment, tolerance):
+    # Simplify in a canonical direction so a border shared by two rings
+    # (traversed in opposite directions) gives identical vertices in both
+    forward = tuple(segment[0]) < tuple(segment[-1]) or (
+        tuple(segment[0]) == tuple(segment[-1]) and tuple(segment[1]) <= tuple(segment[-2]))
+    if forward:
+        return segment[_douglas_peucker(segment, tolerance)]
+    reverse = segment[::-1]
+    return reverse[_douglas_peucker(reverse, tolerance)][::-1]
+
+
+def _simplify_rings(rings, tolerance):
+    """
+    Topology-preserving simplification of closed rings.
+
+    Vertices where the set of rings sharing a point changes are junctions and
+    are always kept; the arcs between junctions are simplified independently,
+    so neighbouring states keep one common border with no gaps or overlaps.
+    """
+    members = defaultdict(set)
+    for ring_id, ring in enumerate(rings):
+        for point in map(tuple, ring[:-1]):
+            members[point].add(ring_id)
+
+    simplified = []
+    for ring in rings:
+        points = ring[:-1]
+        count = len(points)
+        if count < 3:
+            simplified.append(ring)
+            continue
+        sharing = [frozenset(members[tuple(point)]) for point in points]
+        junctions = [i for i in range(count)
+                     if sharing[i] != sharing[i - 1] or sharing[i] != sharing[(i + 1) % count]]
+        if not junctions:
+            # Unshared (or wholly shared) ring: start from its smallest vertex
+            junctions = [min(range(count), key=lambda i: tuple(points[i]))]
+
+        kept = []
+        for position, start in enumerate(junctions):
+            end = junctions[(position + 1) % len(junctions)]
+            if end > start:
+                segment = points[start:end + 1]
+            else:
+                segment = np.concatenate([points[start:], points[:end + 1]])
+            kept.append(_simplify_segment(segment, tolerance)[:-1])
+        result = np.concatenate(kept)
+        simplified.append(np.concatenate([result, result[:1]]))
+    return simplified
+
+
+def _polygons(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def simplify_geojson(geojson, tolerance, decimals):
+    """Round coordinates to `decimals` and simplify every polygon ring topologically"""
+    features = geojson.get('features', [])
+
+    # Flatten every ring, remembering which feature/polygon it belongs to
+    rings, owners = [], []
+    for feature_id, feature in enumerate(features):
+        for polygon_id, polygon in enumerate(_polygons(feature.get('geometry') or {'type': None})):
+            for ring_id, ring in enumerate(polygon):
+                points = np.round(np.asarray(ring, dtype=float)[:, :2], decimals)
+                # Rounding can merge neighbouring vertices
+                distinct = np.ones(len(points), dtype=bool)
+                distinct[1:] = np.any(points[1:] != points[:-1], axis=1)
+                rings.append(points[distinct])
+                owners.append((feature_id, polygon_id, ring_id))
+
+    simplified = _simplify_rings(rings, tolerance)
+
+    geometries = defaultdict(lambda: defaultdict(list))
+    for original, (feature_id, polygon_id, ring_id), ring in zip(rings, owners, simplified):
+        if len(ring) < 4:
+            if ring_id > 0:
+                continue  # drop holes that collapsed
+            ring = original  # keep small islands at full detail rather than losing them
+        geometries[feature_id][polygon_id].append(np.round(ring, decimals).tolist())
+
+    result = []
+    for feature_id, feature in enumerate(features):
+        polygons = [geometries[feature_id][p] for p in sorted(geometries[feature_id])]
+        if (feature.get('geometry') or {}).get('type') == 'Polygon' and polygons:
+            geometry = {'type': 'Polygon', 'coordinates': polygons[0]}
+        else:
+            geometry = {'type': 'MultiPolygon', 'coordinates': polygons}
+        result.append({'type': 'Feature', 'properties': feature.get('properties', {}),
+                       'geometry': geometry})
+    return {'type': 'FeatureCollection', 'features': result}
+
+
+def pack_geojson(geojson, decimals):
+    """
+    Flatten a polygon FeatureCollection into arrays for np.savez: coordinates
+    as integers scaled by 10**decimals plus offset arrays for rings, polygons
+    and features. Properties are kept as one JSON string.
+    """
+    scale = 10 ** decimals
+    coordinates, ring_offsets, polygon_offsets, feature_offsets, multi = [], [0], [0], [0], []
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        multi.append(geometry['type'] == 'MultiPolygon')
+        for polygon in _polygons(geometry):
+            for ring in polygon:
+                coordinates.extend(ring)
+                ring_offsets.append(len(coordinates))
+            polygon_offsets.append(len(ring_offsets) - 1)
+        feature_offsets.append(len(polygon_offsets) - 1)
+    return {
+        'coordinates': np.round(np.asarray(coordinates, dtype=float).reshape(-1, 2) * scale).astype(np.int32),
+        'ring_offsets': np.asarray(ring_offsets, dtype=np.int64),
+        'polygon_offsets': np.asarray(polygon_offsets, dtype=np.int64),
+        'feature_offsets': np.asarray(feature_offsets, dtype=np.int64),
+        'multi': np.asarray(multi, dtype=bool),
+        'decimals': np.asarray(decimals),
+        'properties': np.asarray(json.dumps([f.get('properties', {}) for f in geojson['features']]))
+    }
+
+
+def unpack_geojson(arrays):
+    """Rebuild the FeatureCollection stored by pack_geojson"""
+    decimals = int(arrays['decimals'])
+    coordinates = np.round(arrays['coordinates'] / 10 ** decimals, decimals)
+    ring_offsets = arrays['ring_offsets']
+    polygon_offsets = arrays['polygon_offsets']
+    feature_offsets = arrays['feature_offsets']
+    properties = json.loads(str(arrays['properties']))
+
+    features = []
+    for feature_id, multi in enumerate(arrays['multi']):
+        polygons = []
+        for polygon_id in range(feature_offsets[feature_id], feature_offsets[feature_id + 1]):
+            polygons.append([
+                coordinates[ring_offsets[ring_id]:ring_offsets[ring_id + 1]].tolist()
+                for ring_id in range(polygon_offsets[polygon_id], polygon_offsets[polygon_id + 1])
+            ])
+        if multi or not polygons:
+            geometry = {'type': 'MultiPolygon', 'coordinates': polygons}
+        else:
+            geometry = {'type': 'Polygon', 'coordinates': polygons[0]}
+        features.append({'type': 'Feature', 'properties': properties[feature_id], 'geometry': geometry})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def load_simplified(geojson, level, cache_dir, source_key):
+    """
+    `geojson` simplified to one of DETAIL_LEVELS, read from a compressed .npz
+    in `cache_dir` when one exists for `source_key` (a hash of the source file),
+    and computed and written there otherwise.
+    """
+    settings = DETAIL_LEVELS[level]
+    path = os.path.join(cache_dir, f'{source_key}-{level}.npz')
+    if os.path.exists(path):
+        with np.load(path) as arrays:
+            return unpack_geojson(arrays)
+
+    simplified = simplify_geojson(geojson, settings['tolerance'], settings['decimals'])
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary_path = path + '.tmp.npz'
+    np.savez_compressed(temporary_path, **pack_geojson(simplified, settings['decimals']))
+    os.replace(temporary_path, path)
+    return simplified
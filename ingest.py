@@ -0,0 +1,508 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+
+# Source CSV and the typed columnar copy the dashboard reads
+CSV_PATH = 'Indian_Industrial_Accidents.csv'
+DATASET_PATH = 'Indian_Industrial_Accidents.feather'
+
+# Folder where new report files (same columns as the CSV) are dropped
+INCOMING_DIR = 'incoming'
+
+# Parquet dataset partitioned on disk by Year and State, for archives larger than RAM
+PARTITIONED_PATH = 'Indian_Industrial_Accidents_partitioned'
+PARTITION_COLUMNS = ['Year', 'State']
+
+# Labels of every categorical column, written next to the partitions so the
+# sidebar can offer them without reading any data
+CATALOG_FILE = '_catalog.json'
+
+# Schema metadata key recording how many CSV bytes the dataset was built from
+CSV_OFFSET_KEY = b'csv_offset'
+
+# Schema metadata key listing the path, size, mtime and bytes parsed of every CSV
+# file a dataset built from a glob pattern holds, so added or changed files
+# trigger a rebuild
+SOURCE_FILES_KEY = b'source_files'
+
+# Schema metadata key holding a SHA-1 of the CSV bytes the dataset was built
+# from, taken while converting, so the data can be named by its content
+# without reading it again
+CONTENT_HASH_KEY = b'content_hash'
+
+# The columns of every report CSV, in file order
+CSV_COLUMNS = [
+    'Year', 'DayOfWeek', 'Shift', 'Country', 'State', 'Local', 'Industry Sector',
+    'Accident Severity', 'Potential Severity', 'Accident Type', 'Gender', 'Age',
+    'Employee Type', 'Critical Risk', 'Damage Index', 'Hour Type', 'Safety Gear', 'Month'
+]
+
+# Low-cardinality text columns, stored dictionary-encoded (pandas categoricals)
+CATEGORICAL_COLUMNS = [
+    'DayOfWeek', 'Shift', 'Country', 'State', 'Local', 'Industry Sector',
+    'Accident Severity', 'Potential Severity', 'Accident Type', 'Gender',
+    'Employee Type', 'Critical Risk', 'Hour Type', 'Safety Gear', 'Month'
+]
+
+# Numeric columns and the narrowest integer type that holds their range
+INTEGER_COLUMNS = {
+    'Year': pa.int16(),
+    'Age': pa.int8(),
+    'Damage Index': pa.int16()
+}
+
+# Columns the dashboard actually reads (Country, Potential Severity and
+# Damage Index are never charted, so they are left on disk)
+DASHBOARD_COLUMNS = [
+    'Year', 'DayOfWeek', 'Shift', 'State', 'Local', 'Industry Sector',
+    'Accident Severity', 'Accident Type', 'Gender', 'Age', 'Employee Type',
+    'Critical Risk', 'Hour Type', 'Safety Gear', 'Month'
+]
+
+
+class SchemaError(ValueError):
+    """A report CSV whose columns or values do not fit the dataset's schema"""
+
+
+def _narrow_dictionary(column):
+    """Cast a dictionary column to the smallest index type that fits its dictionary"""
+    size = len(column.chunk(0).dictionary) if column.num_chunks else 0
+    if size <= 127:
+        index_type = pa.int8()
+    elif size <= 32767:
+        index_type = pa.int16()
+    else:
+        return column
+    return column.cast(pa.dictionary(index_type, pa.string()))
+
+
+def _column_types():
+    column_types = {name: pa.dictionary(pa.int32(), pa.string()) for name in CATEGORICAL_COLUMNS}
+    column_types.update(INTEGER_COLUMNS)
+    return column_types
+
+
+def _complete_end(path, start=0):
+    """Offset just past the last newline of `path` at or after `start`, found by reading
+    backwards from the end, so a row still being written is left for later"""
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        while position > start:
+            block = max(start, position - (1 << 16))
+            f.seek(block)
+            newline = f.read(position - block).rfind(b'\n')
+            if newline >= 0:
+                return block + newline + 1
+            position = block
+    return start
+
+
+def _complete_lines(path, start=0):
+    """Bytes of `path` from `start` up to the last newline (see _complete_end)"""
+    end = _complete_end(path, start)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def _write_dataset(table, dataset_path, metadata):
+    """Write parsed CSV blocks as one uncompressed Feather file with narrow shared dictionaries"""
+    # One shared dictionary per column across all parsed blocks (and files)
+    table = table.unify_dictionaries().combine_chunks()
+    for name in CATEGORICAL_COLUMNS:
+        index = table.schema.get_field_index(name)
+        table = table.set_column(index, name, _narrow_dictionary(table.column(name)))
+    table = table.replace_schema_metadata(metadata)
+
+    # Uncompressed so the file can be memory-mapped without decoding
+    tmp_path = dataset_path + '.tmp'
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, dataset_path)
+    return dataset_path
+
+
+def convert_csv(csv_path=CSV_PATH, dataset_path=DATASET_PATH):
+    """Parse the CSV once with explicit types and write it as an uncompressed Feather file"""
+    end = _complete_end(csv_path)
+    # Parsed straight from a memory map of the file's complete lines, without a copy in memory
+    with pa.memory_map(csv_path) as source:
+        data = source.read_buffer(end)
+        content_hash = hashlib.sha1(data).hexdigest()
+        table = pa_csv.read_csv(
+            data,
+            convert_options=pa_csv.ConvertOptions(column_types=_column_types(), strings_can_be_null=True)
+        )
+    # Remember where the parsed rows end, so appended rows can be read on their own
+    return _write_dataset(table, dataset_path, {CSV_OFFSET_KEY: str(end).encode(),
+                                                CONTENT_HASH_KEY: content_hash.encode()})
+
+
+def is_pattern(source):
+    """Whether a CSV source is a glob pattern of files (e.g. 'drops/**/*.csv') rather than one file"""
+    return any(character in source for character in '*?[')
+
+
+def find_csv_files(pattern):
+    """Files matching `pattern` (** matches any folder depth), in sorted order"""
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+
+def dataset_path_for(source):
+    """Default dataset path of a CSV file, or of a pattern: named after its folder"""
+    if not is_pattern(source):
+        return os.path.splitext(source)[0] + '.feather'
+    parts = source.replace(os.sep, '/').split('/')
+    folder = '/'.join(parts[:next(i for i, part in enumerate(parts) if is_pattern(part))])
+    return (os.path.normpath(folder) if folder else 'dataset') + '.feather'
+
+
+def read_csv_file(path, start=0, end=None):
+    """
+    Parse a report CSV into an Arrow table with the CSV_COLUMNS in order, typed
+    like the dataset: the rows in bytes [start, end) of the file, by default
+    every complete line. Raises SchemaError naming the file when its header
+    does not have the CSV_COLUMNS or a value does not parse.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+    columns = next(csv.reader([header.decode('utf-8-sig')]), [])
+    missing = [name for name in CSV_COLUMNS if name not in columns]
+    unexpected = [name for name in columns if name not in CSV_COLUMNS]
+    if missing or unexpected:
+        raise SchemaError(f"{path}: missing columns {missing}, unexpected columns {unexpected}")
+    start = max(start, len(header))
+    end = _complete_end(path, start) if end is None else end
+    column_types = _column_types()
+    if end <= start:
+        return pa.schema([(name, column_types.get(name, pa.string())) for name in CSV_COLUMNS]).empty_table()
+    try:
+        with pa.memory_map(path) as source:
+            source.seek(start)
+            # One thread per file: files are spread over the caller's pool instead
+            table = pa_csv.read_csv(
+                source.read_buffer(end - start),
+                read_options=pa_csv.ReadOptions(column_names=columns, use_threads=False),
+                convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+            )
+    except pa.ArrowInvalid as error:
+        raise SchemaError(f"{path}: {error}") from error
+    return table.select(CSV_COLUMNS)
+
+
+def _hash_file(path, end):
+    """SHA-1 of bytes [0, end) of a file, read through a memory map"""
+    if end == 0:
+        return hashlib.sha1().hexdigest()
+    with pa.memory_map(path) as source:
+        return hashlib.sha1(source.read_buffer(end)).hexdigest()
+
+
+def _file_state(path):
+    """(size, mtime) of a file, which tell whether it changed since it was read"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def convert_csv_files(pattern, dataset_path, workers=None):
+    """
+    Parse every CSV file matching `pattern` on `workers` threads (default: one
+    per core) and write them as one dataset, like convert_csv. Arrow parses
+    without holding the GIL, so files are read in parallel; each file's columns
+    are checked first (see read_csv_file), and the per-file dictionaries are
+    unified into one per column.
+    """
+    paths = find_csv_files(pattern)
+    if not paths:
+        raise FileNotFoundError(f"No CSV files match {pattern!r}")
+    # Taken before parsing, so a file written meanwhile is seen as changed
+    states = [_file_state(path) for path in paths]
+    ends = [_complete_end(path) for path in paths]
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        tables = list(pool.map(read_csv_file, paths, [0] * len(paths), ends))
+        hashes = list(pool.map(_hash_file, paths, ends))
+    # Files parsed with different dictionaries still share the dictionary type, so they concatenate
+    table = pa.concat_tables(tables)
+    listing = [[path, size, mtime, end] for path, (size, mtime), end in zip(paths, states, ends)]
+    # Every file's name and bytes, in the order they were concatenated
+    content_hash = hashlib.sha1()
+    for path, end, file_hash in zip(paths, ends, hashes):
+        content_hash.update(f'{path}:{end}:{file_hash}\n'.encode())
+    return _write_dataset(table, dataset_path, {SOURCE_FILES_KEY: json.dumps(listing).encode(),
+                                                CONTENT_HASH_KEY: content_hash.hexdigest().encode()})
+
+
+def _dataset_metadata(dataset_path):
+    with pa.memory_map(dataset_path) as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+
+
+def dataset_source_files(dataset_path):
+    """
+    The CSV files a dataset built from a pattern holds, path -> (bytes parsed,
+    size, mtime), in the order they were concatenated (empty if not built from one)
+    """
+    listing = json.loads(_dataset_metadata(dataset_path).get(SOURCE_FILES_KEY, b'[]'))
+    # Listings written before the bytes parsed were recorded have three fields
+    return {path: (parsed[0] if parsed else size, size, mtime) for path, size, mtime, *parsed in listing}
+
+
+def ensure_dataset(csv_path=CSV_PATH, dataset_path=DATASET_PATH):
+    """
+    Return the columnar dataset path, converting the CSV if it is missing or
+    stale. `csv_path` may be a glob pattern (see convert_csv_files); the
+    dataset is then rebuilt when files are added, removed or changed (by
+    their size and mtime, without reading them). Datasets written before the
+    content hash was recorded are rebuilt too.
+    """
+    if is_pattern(csv_path):
+        current = {path: _file_state(path) for path in find_csv_files(csv_path)}
+        if (not os.path.exists(dataset_path)
+                or dataset_content_hash(dataset_path) is None
+                or {path: (size, mtime) for path, (_, size, mtime)
+                    in dataset_source_files(dataset_path).items()} != current):
+            convert_csv_files(csv_path, dataset_path)
+    elif (not os.path.exists(dataset_path)
+            or os.path.getmtime(dataset_path) < os.path.getmtime(csv_path)
+            or dataset_csv_offset(dataset_path) == 0
+            or dataset_content_hash(dataset_path) is None):
+        convert_csv(csv_path, dataset_path)
+    return dataset_path
+
+
+def read_dataset(dataset_path=DATASET_PATH, columns=None):
+    """Memory-map the columnar dataset and return the requested columns as a DataFrame"""
+    table = feather.read_table(dataset_path, columns=columns, memory_map=True)
+    # Release each Arrow column once converted, so the data is not held twice while loading
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def dataset_csv_offset(dataset_path=DATASET_PATH):
+    """Number of CSV bytes the dataset holds, read from its schema metadata (0 if unrecorded)"""
+    return int(_dataset_metadata(dataset_path).get(CSV_OFFSET_KEY, 0))
+
+
+def dataset_content_hash(dataset_path=DATASET_PATH):
+    """SHA-1 of the CSV bytes the dataset was built from, from its schema metadata (None if unrecorded)"""
+    content_hash = _dataset_metadata(dataset_path).get(CONTENT_HASH_KEY)
+    return content_hash.decode() if content_hash else None
+
+
+def read_csv_rows(data, column_names=None, columns=DASHBOARD_COLUMNS):
+    """Parse CSV bytes into a DataFrame typed like the dataset (`column_names` when there is no header)"""
+    table = pa_csv.read_csv(
+        pa.py_buffer(data),
+        read_options=pa_csv.ReadOptions(column_names=column_names),
+        convert_options=pa_csv.ConvertOptions(column_types=_column_types(), strings_can_be_null=True,
+                                              include_columns=columns)
+    )
+    return table.to_pandas()
+
+
+class AppendWatcher:
+    """
+    Finds report rows that arrived after the dataset was built.
+
+    Rows appended to the CSV are read from the byte offset the previous poll
+    stopped at. CSV files dropped into `incoming_dir` are read the same way:
+    each file's complete lines once, then lines added to it when its size or
+    mtime changes (a file that shrank is read again from the start). Only the
+    new bytes are parsed, so a poll costs time proportional to the new rows.
+    Dropped files are schema-checked like read_csv_file.
+
+    A source that fails to parse does not hold back the others: its error is
+    kept in `errors` (path -> SchemaError) and its rows are not counted as
+    read. The CSV is tried again on the next poll; a dropped file is set aside
+    until it changes.
+
+    For a dataset built from a glob pattern, pass the pattern instead of a CSV
+    and the files already loaded as `files` (see dataset_source_files): files
+    matching it are watched like incoming ones.
+    """
+
+    def __init__(self, csv_path=CSV_PATH, offset=0, incoming_dir=INCOMING_DIR, files=None):
+        self.pattern = csv_path if is_pattern(csv_path) else None
+        self.csv_path = None if self.pattern else csv_path
+        self.incoming_dir = incoming_dir
+        # Watched file -> (bytes read, size, mtime) when it was last read
+        self.files = dict(files or {})
+        self.offset = offset
+        self.errors = {}
+        if self.csv_path is not None:
+            # Appended chunks have no header line, so parse them with the CSV's column names
+            with open(csv_path, 'rb') as f:
+                header = f.readline()
+            self.column_names = next(csv.reader([header.decode('utf-8-sig')]))
+            self.offset = max(offset, len(header))
+
+    def poll(self):
+        """
+        New rows since the last poll as a DataFrame, or None if there are none.
+        Rows of a source that fails to parse are left out and its error is
+        recorded in `errors`; the rows of every other source are returned.
+        """
+        frames = []
+        if self.csv_path is not None and os.path.getsize(self.csv_path) > self.offset:
+            data = _complete_lines(self.csv_path, self.offset)
+            try:
+                if data.strip():
+                    try:
+                        frames.append(read_csv_rows(data, column_names=self.column_names))
+                    except pa.ArrowInvalid as error:
+                        raise SchemaError(f"{self.csv_path}: {error}") from error
+            except SchemaError as error:
+                # The offset stays put, so the rows are read once the CSV is fixed
+                self.errors[self.csv_path] = error
+            else:
+                self.errors.pop(self.csv_path, None)
+                self.offset += len(data)
+
+        paths = sorted(glob.glob(os.path.join(self.incoming_dir, '*.csv')))
+        if self.pattern is not None:
+            paths += find_csv_files(self.pattern)
+        for path in paths:
+            read, size, mtime = self.files.get(path, (0, None, None))
+            state = _file_state(path)
+            if state == (size, mtime):
+                continue
+            start = read if state[0] >= read else 0
+            end = _complete_end(path, start)
+            if end == 0:
+                # Not even the header is complete yet
+                continue
+            try:
+                if end > start:
+                    frames.append(read_csv_file(path, start, end).select(DASHBOARD_COLUMNS).to_pandas())
+            except SchemaError as error:
+                # Set aside until the file changes; its rows count as unread
+                self.errors[path] = error
+                self.files[path] = (start, *state)
+            else:
+                self.errors.pop(path, None)
+                self.files[path] = (max(end, start), *state)
+        # Files that are gone no longer need fixing
+        for path in [path for path in self.errors if path != self.csv_path and not os.path.exists(path)]:
+            del self.errors[path]
+
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+
+def _partitioning():
+    return ds.partitioning(
+        pa.schema([('Year', INTEGER_COLUMNS['Year']), ('State', pa.string())]), flavor='hive')
+
+
+def write_partitioned(csv_path=CSV_PATH, root=PARTITIONED_PATH):
+    """
+    Stream the CSV into Parquet files under root/Year=.../State=.../, one block
+    at a time, so the archive never has to fit in memory. Also writes the
+    catalog of labels (CATALOG_FILE) the dashboard builds its filters from.
+    """
+    # Text stays plain strings here; Parquet dictionary-encodes them on disk
+    reader = pa_csv.open_csv(
+        csv_path, convert_options=pa_csv.ConvertOptions(column_types=INTEGER_COLUMNS, strings_can_be_null=True))
+    labels = {name: set() for name in CATEGORICAL_COLUMNS + ['Year']}
+
+    def batches():
+        for batch in reader:
+            for name, seen in labels.items():
+                seen.update(pc.unique(batch.column(name)).to_pylist())
+            yield batch
+
+    tmp_root = root + '.tmp'
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    ds.write_dataset(batches(), tmp_root, schema=reader.schema, format='parquet',
+                     partitioning=_partitioning(), max_partitions=100000)
+    catalog = {name: sorted(value for value in seen if value is not None)
+               for name, seen in labels.items()}
+    with open(os.path.join(tmp_root, CATALOG_FILE), 'w') as f:
+        json.dump(catalog, f)
+
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(tmp_root, root)
+    return root
+
+
+def read_catalog(root=PARTITIONED_PATH):
+    """Column -> sorted labels of a partitioned dataset"""
+    with open(os.path.join(root, CATALOG_FILE)) as f:
+        return json.load(f)
+
+
+def _partition_filter(states, years, severities):
+    """Dataset expression for the read_partitions filters, or None when nothing is filtered"""
+    conditions = []
+    if states:
+        conditions.append(ds.field('State').isin(list(states)))
+    if years:
+        conditions.append((ds.field('Year') >= years[0]) & (ds.field('Year') <= years[1]))
+    if severities:
+        conditions.append(ds.field('Accident Severity').isin(list(severities)))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def count_partition_rows(root=PARTITIONED_PATH, states=None, years=None, severities=None):
+    """
+    Number of rows read_partitions would return, from Parquet metadata where
+    the filters allow (only the Severity column is read otherwise), so a
+    selection can be checked before it is loaded
+    """
+    dataset = ds.dataset(root, format='parquet', partitioning=_partitioning())
+    return dataset.count_rows(filter=_partition_filter(states, years, severities))
+
+
+def read_partitions(root=PARTITIONED_PATH, columns=None, states=None, years=None,
+                    severities=None):
+    """
+    Read only the rows matching the filters as a DataFrame.
+
+    `states` and the inclusive `years` range (low, high) select partition
+    directories, so other partitions are never opened; `severities` is
+    checked against Parquet row-group statistics and then row by row.
+    Empty or None filters select everything.
+    """
+    dataset = ds.dataset(root, format='parquet', partitioning=_partitioning())
+    table = dataset.to_table(columns=columns, filter=_partition_filter(states, years, severities))
+
+    # Categorical columns come back as strings; encode them like the Feather file
+    for name in CATEGORICAL_COLUMNS:
+        index = table.schema.get_field_index(name)
+        if index >= 0:
+            table = table.set_column(index, name, table.column(name).dictionary_encode())
+    return table.to_pandas()
+
+
+if __name__ == '__main__':
+    # Usage: python ingest.py [csv_path] [dataset_path]
+    #        python ingest.py --partition [csv_path] [partitioned_path]
+    #        python ingest.py --files 'drops/**/*.csv' [dataset_path]
+    arguments = sys.argv[1:]
+    if arguments[:1] == ['--files']:
+        pattern = arguments[1]
+        target = arguments[2] if len(arguments) > 2 else dataset_path_for(pattern)
+        print(f"Wrote {convert_csv_files(pattern, target)}")
+    elif arguments[:1] == ['--partition']:
+        source = arguments[1] if len(arguments) > 1 else CSV_PATH
+        target = arguments[2] if len(arguments) > 2 else PARTITIONED_PATH
+        print(f"Wrote {write_partitioned(source, target)}")
+    else:
+        source = arguments[0] if len(arguments) > 0 else CSV_PATH
+        target = arguments[1] if len(arguments) > 1 else DATASET_PATH
+        print(f"Wrote {convert_csv(source, target)}")
@@ -0,0 +1,154 @@
+import atexit
+import copy
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from store import combined_codes
+
+# Below this many rows a single-process scan beats shipping work to the pool
+PARALLEL_MIN_ROWS = 1 << 20
+
+# Partitions per worker, so a slow worker does not hold up the merge
+TASKS_PER_WORKER = 4
+
+# Worker process state: shared memory segments mapped so far, by name
+_attached = {}
+
+
+def _worker_codes(layout):
+    """Column -> code array over the parent's shared memory, mapping new segments on first use"""
+    codes = {}
+    for column, (name, dtype, length) in layout.items():
+        if name not in _attached:
+            _attached[name] = shared_memory.SharedMemory(name=name)
+        codes[column] = np.ndarray(length, dtype=dtype, buffer=_attached[name].buf)
+    # Segments the parent has replaced are unmapped, so their memory can be freed
+    in_use = {name for name, _, _ in layout.values()}
+    for name in [name for name in _attached if name not in in_use]:
+        try:
+            _attached.pop(name).close()
+        except BufferError:
+            pass
+    return codes
+
+
+def _count_range(layout, start, end, filters, pending):
+    """Partial counts over rows [start, end): filter the range, then one bincount per group-by"""
+    codes = _worker_codes(layout)
+    mask = None
+    for column, selected in filters.items():
+        matches = np.isin(codes[column][start:end], selected)
+        mask = matches if mask is None else mask & matches
+    rows = slice(start, end) if mask is None else np.flatnonzero(mask) + start
+    return [np.bincount(combined_codes(codes, columns, sizes, rows), minlength=int(np.prod(sizes)))
+            for columns, sizes in pending]
+
+
+def _release(memory):
+    memory.close()
+    memory.unlink()
+
+
+class _Segment:
+    """
+    One column's codes in shared memory, with room for appended rows. The
+    memory is released once no counter refers to the segment any more.
+    """
+
+    def __init__(self, dtype, capacity):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.used = 0  # rows written; appends may only continue from here
+        self.memory = shared_memory.SharedMemory(create=True, size=max(capacity * self.dtype.itemsize, 1))
+        weakref.finalize(self, _release, self.memory)
+
+    def write(self, array, start):
+        """Write array[start:] to rows start onwards"""
+        target = np.ndarray(self.capacity, dtype=self.dtype, buffer=self.memory.buf)
+        target[start:len(array)] = array[start:]
+        del target
+        self.used = len(array)
+
+
+class ParallelCounter:
+    """
+    Counts group-bys in a process pool.
+
+    The code arrays are copied once into shared memory that every worker maps,
+    so a query only sends its filters and group-bys. The rows are split into
+    ranges; each worker filters its range and returns partial bincounts,
+    which are summed in the calling process.
+
+    After an append, extend returns a counter for the longer arrays that
+    shares the pool and copies only the new rows (segments are allocated with
+    room to double). Counters of earlier versions keep working; their
+    segments are released once nothing uses them.
+    """
+
+    def __init__(self, codes, workers, min_rows=PARALLEL_MIN_ROWS):
+        self.workers = workers
+        self.min_rows = min_rows
+        # Spawned workers, since forking the threaded Streamlit server is unsafe
+        self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        self._closed = threading.Event()  # shared with extended counters, like the pool
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+        self._segments = {}
+        self.size = 0
+        self._store(codes)
+
+    def _store(self, codes):
+        start = self.size
+        for column, array in codes.items():
+            segment = self._segments.get(column)
+            if (segment is None or segment.dtype != array.dtype or segment.capacity < len(array)
+                    or segment.used != start):
+                # New segment: a new column, wider codes, no room left, or another
+                # counter has already appended after these rows
+                segment = _Segment(array.dtype, 2 * len(array))
+                segment.write(array, 0)
+            else:
+                segment.write(array, start)
+            self._segments[column] = segment
+        self.size = len(next(iter(codes.values())))
+
+    def extend(self, codes):
+        """A counter over `codes`, the same columns as this counter's with rows appended"""
+        with self._lock:
+            counter = copy.copy(self)
+            counter._segments = dict(self._segments)
+            counter._store(codes)
+        return counter
+
+    @property
+    def closed(self):
+        return self._closed.is_set()
+
+    def count_many(self, pending, filters):
+        """
+        Flat count arrays for `pending` (list of (columns, dictionary sizes))
+        over the rows matching `filters` (column -> tuple of selected codes).
+        """
+        layout = {column: (segment.memory.name, segment.dtype.str, self.size)
+                  for column, segment in self._segments.items()}
+        step = max(1, -(-self.size // (self.workers * TASKS_PER_WORKER)))
+        futures = [self._pool.submit(_count_range, layout, start, min(start + step, self.size),
+                                     filters, pending)
+                   for start in range(0, self.size, step)]
+        totals = [np.zeros(int(np.prod(sizes)), dtype=np.int64) for _, sizes in pending]
+        for future in futures:
+            for total, partial in zip(totals, future.result()):
+                total += partial
+        return totals
+
+    def close(self):
+        """Stop the workers (shared by every extended counter); segments go with their counters"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._pool.shutdown()
@@ -0,0 +1,609 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import approx
+from tracing import span, traced
+
+# Integer columns that are grouped on like categories rather than treated as measures
+ENCODED_NUMERIC_COLUMNS = ['Year']
+
+# Rows per block when several group-bys share one scan; small enough that a
+# block's codes stay in cache while every group-by consumes them
+SCAN_BLOCK_ROWS = 1 << 18
+
+
+def combined_codes(codes, columns, sizes, rows):
+    """One int64 code per row for a group-by, mixed-radix over the columns' dictionary sizes"""
+    combined = codes[columns[0]][rows].astype(np.int64)
+    for name, size in zip(columns[1:], sizes[1:]):
+        combined = combined * size + codes[name][rows]
+    return combined
+
+
+def _as_labels(column):
+    """
+    A column's values as dictionary labels: integers read with missing values
+    come as floats, and are turned back into integers (missing stay NaN)
+    """
+    if column.dtype.kind != 'f':
+        return column
+    present = column.notna().to_numpy()
+    if not (column[present] % 1 == 0).all():
+        return column
+    labels = np.asarray(column, dtype=object)
+    labels[present] = column[present].astype(np.int64).to_numpy()
+    return pd.Series(labels, index=column.index, name=column.name)
+
+
+def _read_only(arrays):
+    """Mark every array of a column dict read-only; views of one store are shared by all sessions"""
+    for array in arrays.values():
+        array.flags.writeable = False
+    return arrays
+
+
+class GrowableArray:
+    """
+    An array with spare capacity after its rows, so appending k rows costs O(k)
+    (capacity doubles when full). Stores hold read-only views of the rows
+    written so far. Only an extension of the newest rows writes in place;
+    extending from an earlier length copies, so earlier views never change.
+    """
+
+    def __init__(self, array, capacity):
+        self._buffer = np.zeros(max(capacity, len(array)), dtype=array.dtype)
+        self._buffer[:len(array)] = array
+        self._length = len(array)
+        self._lock = threading.Lock()
+
+    def holds(self, array):
+        """Whether `array` is a view of this array's rows"""
+        return array.base is self._buffer
+
+    def view(self, length):
+        view = self._buffer[:length]
+        view.flags.writeable = False
+        return view
+
+    def extend(self, length, end, dtype=None):
+        """
+        The growable for `end` rows, the first `length` of them this one's and
+        the rest zero, to be filled in through rows(length, end). Reuses this
+        buffer when `length` is its newest row, `end` fits and `dtype` (default:
+        unchanged) matches.
+        """
+        dtype = self._buffer.dtype if dtype is None else np.dtype(dtype)
+        with self._lock:
+            if length == self._length and end <= len(self._buffer) and dtype == self._buffer.dtype:
+                self._length = end
+                return self
+        grown = GrowableArray(np.empty(0, dtype=dtype), 2 * end)
+        grown._buffer[:length] = self._buffer[:length]
+        grown._length = end
+        return grown
+
+    def rows(self, start, end):
+        """Writable rows, for the caller that just extended to them"""
+        return self._buffer[start:end]
+
+
+def _next_version(version):
+    # Appends count up from the loaded version: 0 -> 1, or 'key' -> ('key', 1) -> ('key', 2)
+    if isinstance(version, str):
+        return (version, 1)
+    if isinstance(version, tuple):
+        return (version[0], version[1] + 1)
+    return version + 1
+
+
+class Binned:
+    """Derived column: numeric `source` values cut into `bins`, coded in `labels` order"""
+
+    def __init__(self, source, bins, labels, right=False):
+        self.source = source
+        self.bins = bins
+        self.labels = list(labels)
+        self.right = right
+
+    def encode(self, codes, values, dictionaries):
+        # Values outside the bins get a trailing code so bincount stays valid
+        binned = pd.cut(values[self.source], bins=self.bins, labels=self.labels, right=self.right)
+        encoded = np.asarray(binned.codes).astype(np.int16)
+        encoded[encoded < 0] = len(self.labels)
+        return encoded
+
+
+class Mapped:
+    """Derived column: labels of categorical `source` mapped through `mapping`, coded in `labels` order"""
+
+    def __init__(self, source, mapping, labels):
+        self.source = source
+        self.mapping = mapping
+        self.labels = list(labels)
+
+    def encode(self, codes, values, dictionaries):
+        # One lookup per source code; unmapped and missing labels get the trailing code
+        missing = len(self.labels)
+        lookup = [self.labels.index(self.mapping[label]) if label in self.mapping else missing
+                  for label in dictionaries[self.source]]
+        return np.array(lookup + [missing], dtype=np.int16)[codes[self.source]]
+
+
+class AccidentStore:
+    """
+    Dictionary-encoded accident data.
+
+    Every categorical column is held as a narrow integer code array plus a
+    dictionary of labels shared by all views of the store. The arrays are
+    read-only, so one store can serve every session. Filtering returns a
+    new view that records the selected codes; counts come from the attached
+    CountCube when it covers the query and otherwise from a `np.bincount` over
+    the codes of the selected rows, which are only located when first needed
+    (through the BitmapIndex when one is attached). With a sample attached
+    (see stratified_sample), counts the cube does not cover are estimated from it.
+    """
+
+    def __init__(self, codes, dictionaries, values, filters=None, cube=None, index=None,
+                 derived=None, version=0, counter=None, aggregates=None, sample=None, weights=None,
+                 sampling=None, buffers=None):
+        self.codes = _read_only(codes)    # column -> int8/int16 code array over all rows
+        self.dictionaries = dictionaries  # column -> pd.Index of labels, position == code
+        self.values = _read_only(values)  # numeric column -> array over all rows
+        self.filters = filters or {}      # column -> tuple of selected codes (OR within, AND across)
+        self.cube = cube                  # optional CountCube over the full store
+        self.index = index                # optional BitmapIndex over the full store
+        self.derived = derived or {}      # derived column -> Binned/Mapped spec it is encoded with
+        self.version = version            # identifies the rows held (bumped by appends), for cache keys;
+                                          # a str is a content hash, the same in every process
+        self.counter = counter            # optional ParallelCounter over the full store
+        self.aggregates = aggregates      # optional AggregateCache shared across sessions
+        self.sample = sample              # optional sample store of the full store, for estimates
+        self.weights = weights            # in a sample store: rows each sampled row stands for
+        self.sampling = sampling          # in a sample store: (strata column, rate per stratum, seed)
+        self.buffers = buffers or {}      # column -> GrowableArray its array is a view of, after appends
+        self._rows = None
+
+    @classmethod
+    def from_frame(cls, df, encode=ENCODED_NUMERIC_COLUMNS):
+        """Encode a DataFrame, turning categorical columns (and `encode`) into codes"""
+        codes, dictionaries, values = {}, {}, {}
+        for name in df.columns:
+            column = df[name]
+            if isinstance(column.dtype, pd.CategoricalDtype) or name in encode:
+                # Sorted dictionaries make code order match label order
+                categorical = pd.Categorical(_as_labels(column))
+                categorical = categorical.reorder_categories(sorted(categorical.categories))
+                column_codes = np.asarray(categorical.codes)
+                dictionary = categorical.categories
+                if (column_codes < 0).any():
+                    # Missing values get a trailing code with a NaN label, like derived
+                    # columns' unbinned values, so they stay out of counts and labels
+                    dtype = np.promote_types(column_codes.dtype, np.min_scalar_type(len(dictionary)))
+                    column_codes = np.where(column_codes < 0, len(dictionary), column_codes).astype(dtype)
+                    dictionary = pd.Index(list(dictionary) + [np.nan], dtype=object)
+                codes[name] = column_codes
+                dictionaries[name] = dictionary
+            else:
+                values[name] = column.to_numpy()
+        return cls(codes, dictionaries, values)
+
+    def _derive(self, **changes):
+        """Return a new view sharing this store's arrays, with some attributes replaced"""
+        attributes = dict(codes=self.codes, dictionaries=self.dictionaries, values=self.values,
+                          filters=self.filters, cube=self.cube, index=self.index,
+                          derived=self.derived, version=self.version, counter=self.counter,
+                          aggregates=self.aggregates, sample=self.sample, weights=self.weights,
+                          sampling=self.sampling, buffers=self.buffers)
+        attributes.update(changes)
+        return AccidentStore(**attributes)
+
+    @property
+    def total_rows(self):
+        """Number of rows in the underlying data, ignoring filters"""
+        if self.codes:
+            return len(next(iter(self.codes.values())))
+        return len(next(iter(self.values.values()), []))
+
+    @property
+    def rows(self):
+        """Selected row positions, or None when no filter is applied"""
+        if self.filters and self._rows is None:
+            with span('select rows', 'filter'):
+                if self.index is not None and self.index.covers(self.filters):
+                    self._rows = self.index.select(self.filters).to_rows()
+                else:
+                    matches = np.ones(self.total_rows, dtype=bool)
+                    for column, selected in self.filters.items():
+                        matches &= np.isin(self.codes[column], selected)
+                    self._rows = np.flatnonzero(matches)
+        return self._rows
+
+    def __len__(self):
+        if not self.filters:
+            return self.total_rows
+        if self._rows is None:
+            if self.cube is not None and self.cube.covers([], self.filters):
+                return int(self.cube.count_array([], self.filters))
+            if self.index is not None and self.index.covers(self.filters):
+                return len(self.index.select(self.filters))
+        return len(self.rows)
+
+    def unfiltered(self):
+        """Return a view of every row, without this view's filters"""
+        return self._derive(filters={})
+
+    def with_version(self, version):
+        """Return a view tagged with `version`, for data loaded outside append"""
+        return self._derive(version=version)
+
+    def with_counter(self, counter):
+        """Return a view that scans large uncovered group-bys with the process pool `counter`"""
+        return self._derive(counter=counter)
+
+    def with_aggregate_cache(self, aggregates):
+        """Return a view that keeps counts in (and reuses them from) the AggregateCache `aggregates`"""
+        return self._derive(aggregates=aggregates)
+
+    def with_sample(self, sample):
+        """Return a view that estimates the counts its cube does not cover from `sample`
+        (see stratified_sample), while approximate counting is enabled (see approx.exact)"""
+        return self._derive(sample=sample)
+
+    def stratified_sample(self, rows, strata='State', min_stratum_rows=1000, seed=0):
+        """
+        Return a store of a stratified Bernoulli sample of about `rows` rows,
+        ignoring filters.
+
+        Each `strata` value is sampled at the overall rate, raised so that at
+        least `min_stratum_rows` of its rows (or all of them) are drawn, and
+        every sampled row is weighted by the inverse of its rate. Counts from
+        the sample are then unbiased estimates, and small states are not lost.
+        Appends extend the sample from the new rows alone, at the same rates.
+        """
+        stratum = self.codes[strata]
+        sizes = np.bincount(stratum, minlength=len(self.dictionaries[strata]))
+        rate = min(1.0, rows / max(self.total_rows, 1))
+        rates = np.minimum(1.0, np.maximum(rate, min_stratum_rows / np.maximum(sizes, 1)))
+        generator = np.random.default_rng(seed)
+        kept = [np.empty(0, dtype=np.int64)]
+        for start in range(0, self.total_rows, SCAN_BLOCK_ROWS):
+            block_rates = rates[stratum[start:start + SCAN_BLOCK_ROWS]]
+            kept.append(start + np.flatnonzero(generator.random(len(block_rates)) < block_rates))
+        kept = np.concatenate(kept)
+        weights = 1.0 / rates[stratum[kept]]
+        weights.flags.writeable = False
+        return AccidentStore({name: codes[kept] for name, codes in self.codes.items()},
+                             self.dictionaries,
+                             {name: values[kept] for name, values in self.values.items()},
+                             derived=self.derived, version=('sample', self.version), weights=weights,
+                             sampling=(strata, rates, seed))
+
+    def _extend_sample(self, delta_codes, delta_values, dictionaries, version):
+        """
+        This store's sample with the new rows (column -> array) sampled at the
+        rates it was drawn with, so an append costs time in the new rows
+        """
+        sample = self.sample
+        strata, rates, seed = sample.sampling
+        stratum = delta_codes[strata]
+        # Strata first seen in the new rows are kept whole, like other small strata
+        rates = np.append(rates, np.ones(len(dictionaries[strata]) - len(rates)))
+        # Seeded by the rows before the new ones, so the same append draws the same rows
+        generator = np.random.default_rng([seed, self.total_rows])
+        kept = np.flatnonzero(generator.random(len(stratum)) < rates[stratum])
+        buffers = dict(sample.buffers)
+        codes = {name: sample._grow(buffers, name, existing, delta_codes[name][kept])
+                 for name, existing in sample.codes.items()}
+        values = {name: sample._grow(buffers, name, existing, delta_values[name][kept])
+                  for name, existing in sample.values.items()}
+        # Weights grow like a column, under a key no column has
+        weights = sample._grow(buffers, None, sample.weights, 1.0 / rates[stratum[kept]])
+        return sample._derive(codes=codes, dictionaries=dictionaries, values=values, weights=weights,
+                              version=('sample', version), sampling=(strata, rates, seed),
+                              buffers=buffers)
+
+    def _aggregate_key(self, columns):
+        # The version stands for the rows held; filters are normalized to sorted (column, codes)
+        return (self.version, tuple(columns), tuple(sorted(self.filters.items())))
+
+    def with_cube(self, cube):
+        """Return a view that answers covered counts from `cube`"""
+        return self._derive(cube=cube)
+
+    def with_index(self, index):
+        """Return a view that locates filtered rows through the bitmap `index`"""
+        return self._derive(index=index)
+
+    def _selected(self, array):
+        return array if self.rows is None else array[self.rows]
+
+    def labels(self, column):
+        """All labels of a categorical column, in code order"""
+        return self.dictionaries[column].dropna().tolist()
+
+    def isin(self, column, values):
+        """Return a view restricted to rows where `column` is any of `values`"""
+        dictionary = self.dictionaries[column]
+        selected = {dictionary.get_loc(value) for value in values if value in dictionary}
+        filters = dict(self.filters)
+        if column in filters:
+            # Filtering the same column twice keeps only values in both selections
+            selected &= set(filters[column])
+        filters[column] = tuple(sorted(selected))
+        return self._derive(filters=filters)
+
+    def filter(self, column, value):
+        """Return a view restricted to rows where `column` equals `value`"""
+        return self.isin(column, [value])
+
+    def with_derived(self, name, spec):
+        """Return a store with a new categorical column encoded by `spec` (Binned or Mapped);
+        appended rows are encoded the same way"""
+        codes = dict(self.codes)
+        dictionaries = dict(self.dictionaries)
+        codes[name] = spec.encode(self.codes, self.values, self.dictionaries)
+        dictionaries[name] = pd.Index(spec.labels + [np.nan])
+        derived = dict(self.derived)
+        derived[name] = spec
+        return self._derive(codes=codes, dictionaries=dictionaries, derived=derived)
+
+    def with_order(self, column, order):
+        """Return a store whose `column` codes follow `order`, with any other labels after it
+        (sorted), so counts and filter options come out in that order"""
+        dictionary = self.dictionaries[column]
+        extra = sorted(label for label in dictionary.dropna() if label not in order)
+        # Missing values keep their label, last
+        ordered = pd.Index(list(order) + extra + ([np.nan] if dictionary.hasnans else []))
+        lookup = ordered.get_indexer(dictionary)
+        dtype = np.promote_types(self.codes[column].dtype, np.min_scalar_type(len(ordered)))
+        codes = dict(self.codes)
+        codes[column] = lookup.astype(dtype)[self.codes[column]]
+        dictionaries = dict(self.dictionaries)
+        dictionaries[column] = ordered
+        return self._derive(codes=codes, dictionaries=dictionaries)
+
+    def append(self, df):
+        """
+        Return a store with the rows of `df` added after the existing ones.
+
+        Only the new rows are encoded: labels the dictionaries have not seen get
+        new trailing codes (existing codes never change), binned columns are
+        binned from their source values, and the attached index and cube are
+        updated from the new rows alone. Derived columns are encoded from the
+        new rows once their source columns are. Columns are kept in
+        GrowableArrays, so the existing rows are not copied again. An attached
+        stratified sample is extended by sampling the new rows.
+        """
+        codes, dictionaries, values = {}, dict(self.dictionaries), {}
+        delta_codes, delta_values = {}, {}
+        buffers = dict(self.buffers)
+        for name in self.values:
+            delta_values[name] = df[name].to_numpy()
+            values[name] = self._grow(buffers, name, self.values[name], delta_values[name])
+        for name, existing in self.codes.items():
+            if name in self.derived:
+                continue
+            column = _as_labels(df[name])
+            # None and NaN alike are missing
+            labels = pd.Index(np.asarray(column.where(column.notna(), np.nan), dtype=object))
+            dictionary = self.dictionaries[name]
+            unseen = labels.unique()
+            unseen = unseen[~unseen.isin(dictionary)]
+            if len(unseen):
+                # Missing values, when first seen, get a NaN label after the new labels
+                if unseen.hasnans:
+                    dictionary = pd.Index(list(dictionary) + sorted(unseen.dropna()) + [np.nan], dtype=object)
+                else:
+                    dictionary = dictionary.append(pd.Index(sorted(unseen)))
+                dictionaries[name] = dictionary
+            dtype = np.promote_types(existing.dtype, np.min_scalar_type(len(dictionary)))
+            delta_codes[name] = dictionary.get_indexer(labels).astype(dtype)
+        for name, spec in self.derived.items():
+            delta_codes[name] = spec.encode(delta_codes, delta_values, dictionaries)
+        # Keep the column order of the existing store
+        delta_codes = {name: delta_codes[name] for name in self.codes}
+        for name, existing in self.codes.items():
+            codes[name] = self._grow(buffers, name, existing, delta_codes[name])
+
+        delta = AccidentStore(delta_codes, dictionaries, delta_values)
+        index = self.index.append(delta_codes) if self.index is not None else None
+        cube = self.cube.append(delta) if self.cube is not None else None
+        # The counter copies only the new rows to its workers, and the sample samples only them
+        counter = self.counter.extend(codes) if self.counter is not None else None
+        version = _next_version(self.version)
+        sample = None
+        if self.sample is not None and self.sample.sampling is not None:
+            sample = self._extend_sample(delta_codes, delta_values, dictionaries, version)
+        return self._derive(codes=codes, dictionaries=dictionaries, values=values,
+                            index=index, cube=cube, version=version, counter=counter,
+                            sample=sample, buffers=buffers)
+
+    def _grow(self, buffers, name, existing, rows):
+        """`existing` followed by `rows`, through (and recorded in) the column's GrowableArray"""
+        buffer = self.buffers.get(name)
+        if buffer is None or not buffer.holds(existing):
+            # First append (or the column was replaced since): one copy, with room to grow
+            buffer = GrowableArray(existing, 2 * (len(existing) + len(rows)))
+        end = len(existing) + len(rows)
+        buffer = buffer.extend(len(existing), end, np.promote_types(existing.dtype, rows.dtype))
+        buffer.rows(len(existing), end)[:] = rows
+        buffers[name] = buffer
+        return buffer.view(end)
+
+    @traced('count', 'aggregate')
+    def count_many(self, keys):
+        """
+        Dense count arrays for several group-bys at once.
+
+        Each key is a column name or a tuple of column names. Keys found in
+        the attached AggregateCache are reused, keys the cube covers are
+        sliced from it, and the rest share a single pass over the selected
+        rows, block by block, with one bincount per key per block (split
+        across processes when a ParallelCounter is attached), or are estimated
+        from the attached sample while approximate counting is enabled.
+        Read-only arrays may be returned.
+        """
+        results = {}
+        pending = []
+        for key in keys:
+            columns = [key] if isinstance(key, str) else list(key)
+            counts = None
+            if self.aggregates is not None:
+                counts = self.aggregates.get(self._aggregate_key(columns))
+            if counts is None and self.cube is not None:
+                started = time.perf_counter()
+                counts = self.cube.count_array(columns, self.filters)
+                if counts is not None and self.aggregates is not None:
+                    self.aggregates.put(self._aggregate_key(columns), counts,
+                                        time.perf_counter() - started)
+            if counts is None:
+                pending.append((key, columns, [len(self.dictionaries[c]) for c in columns]))
+            else:
+                results[key] = counts
+        if not pending:
+            return results
+        if self.sample is not None and approx.enabled():
+            # Estimates stay out of the aggregate cache, which holds exact counts
+            results.update(self._estimate_many(pending))
+            return results
+        started = time.perf_counter()
+        scanned = self._scan_many(pending)
+        if self.aggregates is not None:
+            # One pass served every pending key, so each is charged an equal share of it
+            seconds = (time.perf_counter() - started) / len(pending)
+            for key, columns, _ in pending:
+                self.aggregates.put(self._aggregate_key(columns), scanned[key], seconds)
+        results.update(scanned)
+        return results
+
+    def _estimate_many(self, pending):
+        """Estimated count arrays for (key, columns, sizes) group-bys, from the attached sample"""
+        sample = self.sample._derive(filters=self.filters)
+        with span('estimate', 'aggregate', rows=len(sample)):
+            estimates = sample._scan_many(pending, sample.weights)
+            if approx.is_recording():
+                # Horvitz-Thompson variance of a Bernoulli sample: sum of w(w - 1) over sampled rows
+                variances = sample._scan_many(pending, sample.weights * (sample.weights - 1))
+                for key, columns, _ in pending:
+                    approx.record(columns, estimates[key], approx.Z_95 * np.sqrt(variances[key]))
+        return {key: np.rint(counts).astype(np.int64) for key, counts in estimates.items()}
+
+    def _estimates(self, columns):
+        """Whether counts of `columns` under this view's filters come from the sample"""
+        return (self.sample is not None and approx.enabled()
+                and not (self.cube is not None and self.cube.covers(columns, self.filters)))
+
+    def _scan_many(self, pending, weights=None):
+        """
+        Count arrays for (key, columns, sizes) group-bys from one pass over the
+        selected rows; with `weights` (one per row), sums of them instead.
+        """
+        results = {}
+
+        # A closed counter (server shutting down) leaves the scan to this process
+        if (weights is None and self.counter is not None and not self.counter.closed
+                and self.total_rows >= self.counter.min_rows):
+            partials = self.counter.count_many([(columns, sizes) for _, columns, sizes in pending],
+                                               self.filters)
+            for (key, _, sizes), counts in zip(pending, partials):
+                results[key] = counts.reshape(sizes)
+            return results
+
+        dtype = np.int64 if weights is None else np.float64
+        totals = {key: np.zeros(int(np.prod(sizes)), dtype=dtype) for key, _, sizes in pending}
+        rows = self.rows
+        selected = self.total_rows if rows is None else len(rows)
+        for start in range(0, selected, SCAN_BLOCK_ROWS):
+            if rows is None:
+                block = slice(start, start + SCAN_BLOCK_ROWS)
+            else:
+                block = rows[start:start + SCAN_BLOCK_ROWS]
+            block_weights = None if weights is None else weights[block]
+            for key, columns, sizes in pending:
+                combined = combined_codes(self.codes, columns, sizes, block)
+                totals[key] += np.bincount(combined, weights=block_weights, minlength=len(totals[key]))
+        for key, _, sizes in pending:
+            results[key] = totals[key].reshape(sizes)
+        return results
+
+    def count_array(self, columns):
+        """Dense count array with one axis per column, sized by each dictionary"""
+        key = tuple(columns)
+        return self.count_many([key])[key]
+
+    def _to_value_counts(self, column, counts, observed):
+        result = pd.Series(counts, index=self.dictionaries[column], name='count')
+        keep = result.index.notna()
+        if observed:
+            keep &= (result > 0)
+        result = result[keep]
+        result.index.name = column
+        return result.sort_values(ascending=False, kind='stable')
+
+    def value_counts(self, column, observed=True):
+        """
+        Labels and counts, most frequent first (like Series.value_counts).
+        With observed=False, labels with no rows are kept as zero counts.
+        """
+        return self._to_value_counts(column, self.count_array([column]), observed)
+
+    def value_counts_many(self, columns, observed=True):
+        """value_counts for several columns from a single pass (see count_many)"""
+        counts = self.count_many(columns)
+        return {column: self._to_value_counts(column, counts[column], observed)
+                for column in columns}
+
+    def nunique(self, column):
+        """Number of labels with rows; a Chao1 estimate when counts come from the sample"""
+        return self.nunique_bounds(column)[0]
+
+    def nunique_bounds(self, column):
+        """nunique and its 95% half-width, which is None when the count is exact"""
+        if not self._estimates([column]):
+            return len(self.value_counts(column)), None
+        # Chao1 needs how often each label was drawn, not the weighted estimates
+        drawn = self.sample._derive(filters=self.filters).count_array([column])
+        drawn = drawn[self.dictionaries[column].notna()]
+        estimate, half_width = approx.chao1(drawn)
+        return min(round(estimate), len(drawn)), half_width
+
+    def counts(self, columns, name='Count', observed=True):
+        """
+        Label combinations with their counts (like groupby(...).size().reset_index()).
+        With observed=False, every combination is listed, including zero counts.
+        """
+        counts = self.count_array(columns)
+        if observed:
+            positions = np.nonzero(counts)
+        else:
+            positions = tuple(np.indices(counts.shape).reshape(len(columns), -1))
+        result = pd.DataFrame({
+            column: self.dictionaries[column][position]
+            for column, position in zip(columns, positions)
+        })
+        result[name] = counts[positions]
+        return result.dropna(subset=columns).reset_index(drop=True)
+
+    def crosstab(self, index, columns):
+        """Count matrix of `index` x `columns`, without rows or columns that have no accidents"""
+        counts = self.count_array([index, columns])
+        table = pd.DataFrame(counts, index=self.dictionaries[index],
+                             columns=self.dictionaries[columns])
+        table.index.name = index
+        table.columns.name = columns
+        return table.loc[(table.sum(axis=1) > 0) & table.index.notna(),
+                         (table.sum(axis=0) > 0) & table.columns.notna()]
+
+    def column(self, name):
+        """Decode one column of the selected rows back to labels or values"""
+        if name in self.codes:
+            return pd.Series(np.asarray(self.dictionaries[name])[self._selected(self.codes[name])],
+                             name=name)
+        return pd.Series(self._selected(self.values[name]), name=name)
+
+    def to_frame(self, columns):
+        """Decode the selected rows of `columns` into a plain DataFrame"""
+        return pd.DataFrame({name: self.column(name) for name in columns})
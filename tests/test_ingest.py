@@ -0,0 +1,66 @@
+"""
+AppendWatcher against report files written into a temporary folder: new
+rows are read once, and a source that fails to parse holds back only itself.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingest  # noqa: E402
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ingest.CSV_PATH)
+
+
+def report_lines(count, start=0):
+    """The header and `count` data lines of the CSV, from data line `start`"""
+    with open(CSV_PATH, 'rb') as f:
+        lines = f.read().splitlines(keepends=True)
+    return lines[0], b''.join(lines[1 + start:1 + start + count])
+
+
+def watcher_for(tmp_path, rows=10):
+    header, data = report_lines(rows)
+    csv_path = tmp_path / 'reports.csv'
+    csv_path.write_bytes(header + data)
+    incoming = tmp_path / 'incoming'
+    incoming.mkdir()
+    return ingest.AppendWatcher(str(csv_path), os.path.getsize(csv_path), str(incoming)), csv_path, incoming
+
+
+def test_poll_reads_new_rows_once(tmp_path):
+    watcher, csv_path, incoming = watcher_for(tmp_path)
+    assert watcher.poll() is None
+    header, data = report_lines(5, start=10)
+    with open(csv_path, 'ab') as f:
+        f.write(data)
+    (incoming / 'drop.csv').write_bytes(header + report_lines(7, start=20)[1])
+    assert len(watcher.poll()) == 12
+    assert watcher.poll() is None
+    assert watcher.errors == {}
+
+
+def test_bad_source_holds_back_only_itself(tmp_path):
+    watcher, csv_path, incoming = watcher_for(tmp_path)
+    header, data = report_lines(3, start=10)
+    with open(csv_path, 'ab') as f:
+        f.write(b'20x6' + data[4:])
+    (incoming / 'bad.csv').write_bytes(header + b'20x6' + report_lines(2, start=30)[1][4:])
+    (incoming / 'good.csv').write_bytes(header + report_lines(4, start=20)[1])
+
+    assert len(watcher.poll()) == 4
+    assert set(watcher.errors) == {str(csv_path), str(incoming / 'bad.csv')}
+    assert all(isinstance(error, ingest.SchemaError) for error in watcher.errors.values())
+    # The bad file is set aside until it changes; the CSV is tried again
+    assert watcher.poll() is None
+    assert set(watcher.errors) == {str(csv_path), str(incoming / 'bad.csv')}
+
+    # Once fixed, the held-back rows load
+    with open(csv_path, 'r+b') as f:
+        f.seek(watcher.offset)
+        f.write(b'2016')
+    (incoming / 'bad.csv').write_bytes(header + report_lines(2, start=30)[1])
+    assert len(watcher.poll()) == 5
+    assert watcher.errors == {}
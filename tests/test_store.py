@@ -0,0 +1,137 @@
+"""
+The store's counts against a pandas groupby of the same rows, after sidebar
+filters and after appends that bring labels the store has not seen.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregations  # noqa: E402
+import ingest  # noqa: E402
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ingest.CSV_PATH)
+
+COUNTED_COLUMNS = ['Year', 'State', 'Local', 'Accident Type', 'Age Range']
+
+FILTERS = [
+    {},
+    {'State': ['Assam']},
+    {'State': ['Assam', 'Karnataka'], 'Accident Severity': ['Fatal']},
+    {'Shift': ['Night'], 'Gender': ['Male']},
+    # Not in the count cube, so answered by a scan
+    {'Local': ['Karnataka_Local_6', 'Assam_Local_11'], 'Critical Risk': ['Fall from Height', 'Fire/Explosion']},
+]
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return ingest.read_csv_file(CSV_PATH).select(ingest.DASHBOARD_COLUMNS).to_pandas()
+
+
+@pytest.fixture(scope='module')
+def store(frame):
+    return aggregations.build_store(frame)
+
+
+def with_age_range(frame):
+    """The frame with plain text columns and the store's derived Age Range"""
+    frame = frame.astype({column: object for column in frame.columns
+                          if isinstance(frame[column].dtype, pd.CategoricalDtype)})
+    frame['Age Range'] = pd.cut(frame['Age'], bins=aggregations.AGE_BINS, labels=aggregations.AGE_LABELS,
+                                right=False)
+    return frame
+
+
+def new_reports(frame, rows, seed, local):
+    """Rows drawn from `frame`, some with a new Local and a new State"""
+    reports = with_age_range(frame.sample(rows, random_state=seed).reset_index(drop=True))
+    reports.loc[:4, 'Local'] = local
+    reports.loc[5:7, 'State'] = 'Newstate'
+    return reports.drop(columns='Age Range')
+
+
+def assert_counts_match(store, frame, filters=FILTERS):
+    frame = with_age_range(frame)
+    for selections in filters:
+        view = aggregations.apply_filters(store, selections)
+        mask = np.ones(len(frame), dtype=bool)
+        for column, values in selections.items():
+            mask &= frame[column].isin(values).to_numpy()
+        expected_rows = frame[mask]
+        assert len(view) == len(expected_rows), selections
+        for column in COUNTED_COLUMNS:
+            expected = expected_rows.groupby(column, observed=True).size()
+            counts = view.value_counts(column)
+            expected, counts = expected[expected > 0].sort_index(), counts[counts > 0].sort_index()
+            assert counts.to_dict() == expected.to_dict(), (selections, column)
+
+
+@pytest.mark.parametrize('selections', FILTERS)
+def test_filtered_counts_match_groupby(store, frame, selections):
+    assert_counts_match(store, frame, [selections])
+
+
+NEW_LABEL_FILTERS = FILTERS + [{'State': ['Newstate']}, {'Local': ['L_new1', 'L_new2', 'L_new3']},
+                               {'State': ['Newstate', 'Assam'], 'Shift': ['Night']}]
+
+
+def test_counts_match_groupby_after_appends_with_new_labels(store, frame):
+    first, second, branch = (new_reports(frame, 301, 1, 'L_new1'), new_reports(frame, 203, 2, 'L_new2'),
+                             new_reports(frame, 97, 3, 'L_new3'))
+    appended = store.append(first)
+    assert_counts_match(appended, pd.concat([frame, first], ignore_index=True), NEW_LABEL_FILTERS)
+    twice = appended.append(second)
+    assert_counts_match(twice, pd.concat([frame, first, second], ignore_index=True), NEW_LABEL_FILTERS)
+    # Appending to an earlier version leaves the later one as it was
+    branched = appended.append(branch)
+    assert_counts_match(branched, pd.concat([frame, first, branch], ignore_index=True), NEW_LABEL_FILTERS)
+    assert_counts_match(twice, pd.concat([frame, first, second], ignore_index=True), NEW_LABEL_FILTERS)
+    assert_counts_match(appended, pd.concat([frame, first], ignore_index=True), NEW_LABEL_FILTERS)
+
+
+def test_missing_values_are_left_out_of_counts(frame):
+    frame = frame.copy()
+    frame['Year'] = frame['Year'].astype(float)
+    frame.loc[:9, 'Year'] = np.nan
+    frame.loc[10:19, 'State'] = None
+    frame.loc[20:29, 'Age'] = np.nan
+    store = aggregations.build_store(frame)
+    assert store.labels('Year') == sorted(frame['Year'].dropna().astype(int).unique())
+    assert_counts_match(store, frame)
+
+    # Missing values first seen in appended rows
+    reports = new_reports(frame.dropna(), 50, 4, 'L_new1')
+    reports.loc[:2, 'Gender'] = None
+    appended = store.append(reports)
+    assert_counts_match(appended, pd.concat([with_age_range(frame).drop(columns='Age Range'), reports],
+                                            ignore_index=True), NEW_LABEL_FILTERS)
+    assert appended.crosstab('Gender', 'Shift').index.notna().all()
+
+
+def test_append_extends_the_sample_from_new_rows(store, frame):
+    sampled = store.with_sample(store.stratified_sample(2000, min_stratum_rows=50))
+    reports = new_reports(frame, 2000, 5, 'L_new1')
+    appended = sampled.append(reports)
+    before, after = sampled.sample, appended.sample
+    assert after.version == ('sample', appended.version)
+    # The rows drawn before stay, followed by new rows at the same per-state rates
+    for name, codes in before.codes.items():
+        assert (after.codes[name][:len(before)] == codes).all()
+    new_weights = after.weights[len(before):]
+    states = after.codes['State'][len(before):]
+    rates = before.sampling[1]
+    known = states < len(rates)
+    assert np.allclose(new_weights[known], 1 / rates[states[known]])
+    # A state first seen in the appended rows is kept whole
+    newstate = appended.dictionaries['State'].get_loc('Newstate')
+    assert (states == newstate).sum() == (reports['State'] == 'Newstate').sum()
+    assert np.allclose(new_weights[states == newstate], 1)
+    estimated = appended._estimate_many([('Shift', ['Shift'], [len(appended.dictionaries['Shift'])])])
+    assert abs(estimated['Shift'].sum() - len(appended)) < 0.1 * len(appended)
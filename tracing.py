@@ -0,0 +1,101 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# The trace of the rerun in progress; None when timing is off
+_current = contextvars.ContextVar('trace', default=None)
+
+
+class Trace:
+    """
+    Timing spans recorded during one dashboard rerun.
+
+    Spans nest by time on each thread, so a chart's span contains the count
+    and serialization spans that ran inside it. Exported as Chrome trace JSON
+    (chrome://tracing, ui.perfetto.dev).
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self._lock = threading.Lock()
+
+    def add(self, name, category, start, end, args=None):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - self.origin) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self):
+        """Spans as rows of name, category, milliseconds and any span arguments, slowest first"""
+        rows = [{'span': e['name'], 'category': e['cat'], 'ms': round(e['dur'] / 1000, 2),
+                 **e.get('args', {})}
+                for e in self.events]
+        return sorted(rows, key=lambda row: row['ms'], reverse=True)
+
+    def to_chrome(self):
+        return {'traceEvents': sorted(self.events, key=lambda e: e['ts']), 'displayTimeUnit': 'ms'}
+
+    def write(self, directory):
+        """Save as a Chrome trace file in `directory`; returns its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime('trace-%Y%m%d-%H%M%S-') + f'{id(self):x}.json')
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome(), f)
+        return path
+
+
+def start():
+    """Begin a trace for the current rerun (and anything run in its context)"""
+    trace = Trace()
+    _current.set(trace)
+    return trace
+
+
+def stop():
+    _current.set(None)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name, category='app', **args):
+    """
+    Time the block as one span of the current trace; free when timing is off.
+    Yields the span's arguments, so the block can add what it measured.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield args
+        return
+    start_time = time.perf_counter()
+    try:
+        yield args
+    finally:
+        trace.add(name, category, start_time, time.perf_counter(), args)
+
+
+def traced(name, category='app'):
+    """Decorator recording every call of a function as a span"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate